@@ -0,0 +1,87 @@
+import argparse
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List, Optional
+
+# Support running this file directly: `python backend/archive.py`.
+if __package__ in (None, ""):
+    sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from backend.cache import BORROWS, bump_versions
+from backend.config import ARCHIVE_AFTER_DAYS, ARCHIVE_BATCH_SIZE
+from backend.models import BorrowHistory, BorrowRecord
+
+HISTORY_COLUMNS = [column.name for column in BorrowHistory.__table__.columns]
+
+
+def archive_returned(
+    db: Session,
+    older_than_days: int = ARCHIVE_AFTER_DAYS,
+    batch_size: int = ARCHIVE_BATCH_SIZE,
+    now: Optional[datetime] = None,
+) -> int:
+    """Move loans returned before the cutoff into `borrow_history`, one batch per commit.
+
+    Returns the number of rows moved.
+    """
+    cutoff = (now or datetime.now()) - timedelta(days=older_than_days)
+    # SQLite gives the next insert max(id) + 1, so moving the newest row out
+    # would let a new loan reuse an id that already lives in history.
+    newest_id = db.query(func.max(BorrowRecord.id)).scalar()
+    if newest_id is None:
+        return 0
+
+    source = BorrowRecord.__table__
+    moved = 0
+    while True:
+        ids = [
+            borrow_id
+            for (borrow_id,) in db.query(BorrowRecord.id)
+            .filter(
+                BorrowRecord.returned_at.isnot(None),
+                BorrowRecord.returned_at < cutoff,
+                BorrowRecord.id < newest_id,
+            )
+            .limit(batch_size)
+        ]
+        if not ids:
+            break
+        db.execute(
+            insert(BorrowHistory).from_select(
+                HISTORY_COLUMNS,
+                select(*[source.c[name] for name in HISTORY_COLUMNS]).where(source.c.id.in_(ids)),
+            )
+        )
+        db.execute(delete(BorrowRecord).where(BorrowRecord.id.in_(ids)).execution_options(synchronize_session=False))
+        bump_versions(db, BORROWS)
+        db.commit()
+        moved += len(ids)
+    return moved
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Move old returned loans into the borrow_history table.")
+    parser.add_argument("--days", type=int, default=ARCHIVE_AFTER_DAYS, help="Archive loans returned more than N days ago")
+    parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE, help="Rows moved per transaction")
+    args = parser.parse_args(argv)
+    if args.batch_size < 1:
+        parser.error("--batch-size must be at least 1")
+
+    from backend.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        moved = archive_returned(db, older_than_days=args.days, batch_size=args.batch_size)
+    finally:
+        db.close()
+    print(f"Archived: {moved}  ({(time.perf_counter() - started) * 1000:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from fastapi import Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from backend import cache, crud
+from backend.config import DEFAULT_PAGE_SIZE
+from backend.schemas import BookCreate, BorrowCreate, StudentCreate
+
+# Async front for crud.py. `run_sync` executes the existing ORM code against the
+# AsyncSession's connection, so business rules live in exactly one place while
+# the event loop is free during every database round-trip.
+
+
+async def cached_json(
+    db: AsyncSession,
+    request: Request,
+    families: Iterable[str],
+    response_model: Any,
+    build: Callable[[Session], Any],
+    bucket: Optional[int] = None,
+) -> Response:
+    return await db.run_sync(
+        lambda session: cache.cached_json(request, session, families, response_model, build, bucket)
+    )
+
+
+async def ensure_sections(db: AsyncSession) -> None:
+    await db.run_sync(crud.ensure_sections)
+
+
+async def list_sections(db: AsyncSession) -> List[Dict[str, Any]]:
+    return await db.run_sync(crud.list_sections)
+
+
+async def list_books(
+    db: AsyncSession,
+    section_id: Optional[int] = None,
+    include_out_of_stock: bool = True,
+    limit: int = DEFAULT_PAGE_SIZE,
+    after: Optional[str] = None,
+) -> Dict[str, Any]:
+    return await db.run_sync(
+        crud.list_books,
+        section_id=section_id,
+        include_out_of_stock=include_out_of_stock,
+        limit=limit,
+        after=after,
+    )
+
+
+async def create_book(db: AsyncSession, payload: BookCreate) -> Dict[str, Any]:
+    return await db.run_sync(crud.create_book, payload)
+
+
+async def add_book_stock(db: AsyncSession, book_id: int, added_copies: int) -> Dict[str, Any]:
+    return await db.run_sync(crud.add_book_stock, book_id, added_copies)
+
+
+async def create_student(db: AsyncSession, payload: StudentCreate) -> Dict[str, Any]:
+    return await db.run_sync(crud.create_student, payload)
+
+
+async def list_students(
+    db: AsyncSession,
+    limit: int = DEFAULT_PAGE_SIZE,
+    after: Optional[str] = None,
+) -> Dict[str, Any]:
+    return await db.run_sync(crud.list_students, limit=limit, after=after)
+
+
+async def borrow_book(db: AsyncSession, payload: BorrowCreate) -> Dict[str, Any]:
+    return await db.run_sync(crud.borrow_book, payload)
+
+
+async def return_book(db: AsyncSession, borrow_id: int) -> Dict[str, Any]:
+    return await db.run_sync(crud.return_book, borrow_id)
+
+
+async def borrow_books_batch(db: AsyncSession, items: List[BorrowCreate]) -> Dict[str, Any]:
+    return await db.run_sync(crud.borrow_books_batch, items)
+
+
+async def return_books_batch(db: AsyncSession, borrow_ids: List[int]) -> Dict[str, Any]:
+    return await db.run_sync(crud.return_books_batch, borrow_ids)
+
+
+async def list_borrows(
+    db: AsyncSession,
+    only_active: bool = False,
+    only_overdue: bool = False,
+    limit: int = DEFAULT_PAGE_SIZE,
+    after: Optional[str] = None,
+    include_history: bool = False,
+) -> Dict[str, Any]:
+    return await db.run_sync(
+        crud.list_borrows,
+        only_active=only_active,
+        only_overdue=only_overdue,
+        limit=limit,
+        after=after,
+        include_history=include_history,
+    )
+
+
+async def list_defaulters(
+    db: AsyncSession,
+    limit: int = DEFAULT_PAGE_SIZE,
+    after: Optional[str] = None,
+) -> Dict[str, Any]:
+    return await db.run_sync(crud.list_defaulters, limit=limit, after=after)
+
+
+async def dashboard_summary(db: AsyncSession) -> Dict[str, Any]:
+    return await db.run_sync(crud.dashboard_summary)
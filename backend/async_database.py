@@ -0,0 +1,28 @@
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from backend.config import ASYNC_DATABASE_REPLICA_URL, ASYNC_DATABASE_URL
+from backend.database import RoutingSession, apply_sqlite_profile, engine_options
+
+# Only imported when ASYNC_DATABASE is enabled, so the async driver
+# (aiosqlite, asyncpg, ...) stays an optional dependency.
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL))
+# Connection events are registered on the sync facade the async engine wraps.
+apply_sqlite_profile(async_engine.sync_engine)
+
+async_replica_engine = None
+if ASYNC_DATABASE_REPLICA_URL:
+    async_replica_engine = create_async_engine(
+        ASYNC_DATABASE_REPLICA_URL, **engine_options(ASYNC_DATABASE_REPLICA_URL)
+    )
+    apply_sqlite_profile(async_replica_engine.sync_engine)
+
+
+class AsyncPrimaryReplicaSession(RoutingSession):
+    replica = async_replica_engine.sync_engine if async_replica_engine is not None else None
+
+
+AsyncSessionLocal = async_sessionmaker(
+    autoflush=False,
+    bind=async_engine,
+    sync_session_class=AsyncPrimaryReplicaSession,
+)
@@ -0,0 +1,133 @@
+from functools import partial
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend import async_crud, crud, schemas
+from backend.cache import ALL_FAMILIES, BOOKS, SECTIONS, dashboard_bucket
+from backend.async_database import AsyncSessionLocal
+from backend.config import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from backend.replica import route_session
+from backend.responses import FastJSONResponse
+
+# Mirrors the core routes in main.py as `async def` handlers. main.py mounts
+# this router ahead of its own routes when ASYNC_DATABASE is enabled.
+router = APIRouter(default_response_class=FastJSONResponse)
+
+
+async def get_async_db(request: Request, response: Response):
+    async with AsyncSessionLocal() as db:
+        route_session(db, request, response)
+        yield db
+
+
+@router.get("/sections", response_model=List[schemas.SectionOut])
+async def get_sections(request: Request, db: AsyncSession = Depends(get_async_db)):
+    return await async_crud.cached_json(db, request, (SECTIONS, BOOKS), List[schemas.SectionOut], crud.list_sections)
+
+
+@router.post("/sections/seed", response_model=List[schemas.SectionOut])
+async def seed_sections(db: AsyncSession = Depends(get_async_db)):
+    await async_crud.ensure_sections(db)
+    return await async_crud.list_sections(db)
+
+
+@router.get("/books", response_model=schemas.BookPage)
+async def get_books(
+    request: Request,
+    section_id: Optional[int] = Query(default=None, gt=0),
+    include_out_of_stock: bool = True,
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    build = partial(
+        crud.list_books,
+        section_id=section_id,
+        include_out_of_stock=include_out_of_stock,
+        limit=limit,
+        after=after,
+    )
+    return await async_crud.cached_json(db, request, (BOOKS,), schemas.BookPage, build)
+
+
+@router.post("/books", response_model=schemas.BookOut)
+async def create_book(payload: schemas.BookCreate, db: AsyncSession = Depends(get_async_db)):
+    return await async_crud.create_book(db, payload)
+
+
+@router.patch("/books/{book_id}/stock", response_model=schemas.BookOut)
+async def restock_book(book_id: int, payload: schemas.StockUpdate, db: AsyncSession = Depends(get_async_db)):
+    return await async_crud.add_book_stock(db, book_id, payload.added_copies)
+
+
+@router.get("/students", response_model=schemas.StudentPage)
+async def get_students(
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    return FastJSONResponse(await async_crud.list_students(db, limit=limit, after=after))
+
+
+@router.post("/students", response_model=schemas.StudentOut)
+async def create_student(payload: schemas.StudentCreate, db: AsyncSession = Depends(get_async_db)):
+    return await async_crud.create_student(db, payload)
+
+
+@router.get("/borrows", response_model=schemas.BorrowPage)
+async def get_borrows(
+    only_active: bool = False,
+    only_overdue: bool = False,
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    include_history: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+):
+    return FastJSONResponse(
+        await async_crud.list_borrows(
+            db,
+            only_active=only_active,
+            only_overdue=only_overdue,
+            limit=limit,
+            after=after,
+            include_history=include_history,
+        )
+    )
+
+
+@router.post("/borrow", response_model=schemas.BorrowOut)
+async def borrow(payload: schemas.BorrowCreate, db: AsyncSession = Depends(get_async_db)):
+    return await async_crud.borrow_book(db, payload)
+
+
+@router.post("/borrow/batch", response_model=schemas.BatchResult)
+async def borrow_batch(payload: schemas.BorrowBatchCreate, db: AsyncSession = Depends(get_async_db)):
+    return await async_crud.borrow_books_batch(db, payload.items)
+
+
+@router.post("/return/batch", response_model=schemas.BatchResult)
+async def return_batch(payload: schemas.ReturnBatchCreate, db: AsyncSession = Depends(get_async_db)):
+    return await async_crud.return_books_batch(db, payload.borrow_ids)
+
+
+@router.post("/return/{borrow_id}", response_model=schemas.BorrowOut)
+async def return_book(borrow_id: int, db: AsyncSession = Depends(get_async_db)):
+    return await async_crud.return_book(db, borrow_id)
+
+
+@router.get("/defaulters", response_model=schemas.BorrowPage)
+async def get_defaulters(
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    return FastJSONResponse(await async_crud.list_defaulters(db, limit=limit, after=after))
+
+
+@router.get("/dashboard", response_model=schemas.DashboardOut)
+async def get_dashboard(request: Request, db: AsyncSession = Depends(get_async_db)):
+    return await async_crud.cached_json(
+        db, request, ALL_FAMILIES, schemas.DashboardOut, crud.dashboard_summary, bucket=dashboard_bucket()
+    )
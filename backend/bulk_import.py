@@ -0,0 +1,340 @@
+import argparse
+import csv
+import json
+import sys
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+# Support running this file directly: `python backend/bulk_import.py`.
+if __package__ in (None, ""):
+    sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from pydantic import ValidationError
+from sqlalchemy import bindparam, insert, update
+from sqlalchemy.orm import Session
+
+from backend.cache import BOOKS, SECTIONS, STUDENTS, bump_versions
+from backend.config import IMPORT_CHUNK_SIZE, IMPORT_MAX_ERRORS
+from backend.crud import normalize_student
+from backend.models import Book, Section, Student
+from backend.schemas import BookCreate, StudentCreate
+from backend.stats import bump_stats
+
+FORMATS = ("csv", "ndjson")
+
+BookKey = Tuple[str, str, str, int]
+
+
+def iter_records(stream: TextIO, fmt: str) -> Iterator[Tuple[int, Any]]:
+    """Yield `(row_number, record)` pairs from a CSV or NDJSON text stream.
+
+    Records that cannot be parsed are yielded as the exception instead of a
+    dict, so the importer can report them without stopping the stream.
+    """
+    if fmt == "csv":
+        # Row 1 is the header, so data rows start at 2 like in a spreadsheet.
+        for row_number, record in enumerate(csv.DictReader(stream), start=2):
+            yield row_number, record
+    elif fmt == "ndjson":
+        for row_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as exc:
+                yield row_number, exc
+                continue
+            if not isinstance(record, dict):
+                yield row_number, ValueError("Each line must be a JSON object")
+                continue
+            yield row_number, record
+    else:
+        raise ValueError(f"Unsupported format {fmt!r}; expected one of {', '.join(FORMATS)}")
+
+
+def _chunks(records: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    iterator = iter(records)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _validation_message(exc: ValidationError) -> str:
+    error = exc.errors()[0]
+    field = ".".join(str(part) for part in error.get("loc", ()))
+    return f"{field}: {error.get('msg')}" if field else str(error.get("msg"))
+
+
+class _Report:
+    def __init__(self) -> None:
+        self.inserted = 0
+        self.updated = 0
+        self.failed = 0
+        self.errors: List[Dict[str, Any]] = []
+
+    def fail(self, row: int, detail: str) -> None:
+        self.failed += 1
+        if len(self.errors) < IMPORT_MAX_ERRORS:
+            self.errors.append({"row": row, "detail": detail})
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "failed": self.failed,
+            "errors": self.errors,
+        }
+
+
+def _parse_book(record: Dict[str, Any], sections: Dict[str, int], section_ids: set) -> BookCreate:
+    record = {key.strip().lower(): value for key, value in record.items() if key}
+    # Accept either a numeric section_id or a section name column.
+    section_id = record.get("section_id")
+    if section_id in (None, "") and record.get("section"):
+        section_id = sections.get(str(record["section"]).strip().upper())
+        if section_id is None:
+            raise LookupError(f"Unknown section {record['section']!r}")
+    payload = BookCreate(
+        title=record.get("title") or "",
+        author=record.get("author") or "",
+        version=record.get("version") or "",
+        cost=record.get("cost"),
+        section_id=section_id,
+        total_copies=record.get("total_copies") or record.get("copies"),
+    )
+    if payload.section_id not in section_ids:
+        raise LookupError("Section not found")
+    return payload
+
+
+def import_books(
+    db: Session,
+    records: Iterable[Tuple[int, Any]],
+    upsert: bool = False,
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+) -> Dict[str, Any]:
+    """Insert books from parsed records in chunked transactions.
+
+    Duplicates are detected against `uq_book_identity` one chunk at a time.
+    With `upsert`, rows that match an existing book add their copies to it
+    instead of being reported as conflicts.
+    """
+    sections = {name.upper(): section_id for section_id, name in db.query(Section.id, Section.name).all()}
+    section_ids = set(sections.values())
+    report = _Report()
+    book_table = Book.__table__
+    add_copies = (
+        update(book_table)
+        .where(book_table.c.id == bindparam("book_id"))
+        .values(
+            total_copies=book_table.c.total_copies + bindparam("added"),
+            available_copies=book_table.c.available_copies + bindparam("added"),
+            status="AVAILABLE",
+        )
+    )
+
+    for chunk in _chunks(records, chunk_size):
+        pending: Dict[BookKey, Dict[str, Any]] = {}
+        for row_number, record in chunk:
+            if isinstance(record, Exception):
+                report.fail(row_number, f"Unreadable row: {record}")
+                continue
+            try:
+                payload = _parse_book(record, sections, section_ids)
+            except ValidationError as exc:
+                report.fail(row_number, _validation_message(exc))
+                continue
+            except LookupError as exc:
+                report.fail(row_number, str(exc.args[0]))
+                continue
+
+            key = (payload.title.strip(), payload.author.strip(), payload.version.strip(), payload.section_id)
+            if key in pending:
+                if upsert:
+                    pending[key]["copies"] += payload.total_copies
+                else:
+                    report.fail(row_number, "Duplicate of an earlier row in this file")
+                continue
+            pending[key] = {"row": row_number, "payload": payload, "copies": payload.total_copies}
+
+        if not pending:
+            continue
+
+        existing = {
+            (row.title, row.author, row.version, row.section_id): row
+            for row in db.query(
+                Book.id,
+                Book.title,
+                Book.author,
+                Book.version,
+                Book.section_id,
+                Book.available_copies,
+            )
+            .filter(Book.title.in_({key[0] for key in pending}))
+            .all()
+        }
+
+        inserts = []
+        increments = []
+        available_delta = 0
+        back_in_stock = 0
+        for key, item in pending.items():
+            match = existing.get(key)
+            if match is None:
+                payload = item["payload"]
+                inserts.append(
+                    {
+                        "title": key[0],
+                        "author": key[1],
+                        "version": key[2],
+                        "cost": payload.cost,
+                        "section_id": payload.section_id,
+                        "total_copies": item["copies"],
+                        "available_copies": item["copies"],
+                        "status": "AVAILABLE",
+                    }
+                )
+            elif upsert:
+                increments.append({"book_id": match.id, "added": item["copies"]})
+                back_in_stock += int(match.available_copies <= 0)
+            else:
+                report.fail(item["row"], "This book/version already exists in the selected section")
+                continue
+            available_delta += item["copies"]
+
+        if inserts:
+            db.execute(insert(Book), inserts)
+        if increments:
+            db.execute(add_copies, increments)
+        bump_stats(
+            db,
+            total_books=len(inserts),
+            available_books=available_delta,
+            out_of_stock_books=-back_in_stock,
+        )
+        if inserts or increments:
+            bump_versions(db, SECTIONS, BOOKS)
+        db.commit()
+        report.inserted += len(inserts)
+        report.updated += len(increments)
+
+    return report.as_dict()
+
+
+def import_students(
+    db: Session,
+    records: Iterable[Tuple[int, Any]],
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+) -> Dict[str, Any]:
+    """Enrol students from parsed records in chunked transactions.
+
+    Each chunk is checked against existing matric numbers and emails with a
+    single IN query; conflicting rows are reported and the rest bulk-inserted.
+    """
+    report = _Report()
+    seen_matrics: set = set()
+    seen_emails: set = set()
+
+    for chunk in _chunks(records, chunk_size):
+        pending = []
+        for row_number, record in chunk:
+            if isinstance(record, Exception):
+                report.fail(row_number, f"Unreadable row: {record}")
+                continue
+            record = {key.strip().lower(): value for key, value in record.items() if key}
+            try:
+                payload = StudentCreate(
+                    full_name=record.get("full_name") or "",
+                    matric_number=record.get("matric_number") or "",
+                    email=record.get("email") or "",
+                    department=record.get("department") or None,
+                )
+            except ValidationError as exc:
+                report.fail(row_number, _validation_message(exc))
+                continue
+
+            fields = normalize_student(payload)
+            if fields["matric_number"] in seen_matrics or fields["email"] in seen_emails:
+                report.fail(row_number, "Duplicate matric number or email earlier in this file")
+                continue
+            seen_matrics.add(fields["matric_number"])
+            seen_emails.add(fields["email"])
+            pending.append((row_number, fields))
+
+        if not pending:
+            continue
+
+        matrics = [fields["matric_number"] for _, fields in pending]
+        emails = [fields["email"] for _, fields in pending]
+        taken_matrics = set()
+        taken_emails = set()
+        for matric_number, email in (
+            db.query(Student.matric_number, Student.email)
+            .filter(Student.matric_number.in_(matrics) | Student.email.in_(emails))
+            .all()
+        ):
+            taken_matrics.add(matric_number)
+            taken_emails.add(email)
+
+        inserts = []
+        for row_number, fields in pending:
+            if fields["matric_number"] in taken_matrics or fields["email"] in taken_emails:
+                report.fail(row_number, "Student with matric number or email already exists")
+                continue
+            inserts.append(fields)
+
+        if inserts:
+            db.execute(insert(Student), inserts)
+            bump_stats(db, total_students=len(inserts))
+            bump_versions(db, STUDENTS)
+            db.commit()
+            report.inserted += len(inserts)
+
+    return report.as_dict()
+
+
+def detect_format(path: Path, fmt: Optional[str]) -> str:
+    if fmt:
+        return fmt
+    return "ndjson" if path.suffix.lower() in (".ndjson", ".jsonl") else "csv"
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Bulk import catalogue data from CSV or NDJSON.")
+    subparsers = parser.add_subparsers(dest="kind", required=True)
+
+    books_parser = subparsers.add_parser("books", help="Import books")
+    books_parser.add_argument("path", type=Path)
+    books_parser.add_argument("--format", choices=FORMATS)
+    books_parser.add_argument("--upsert", action="store_true", help="Add copies to books that already exist")
+    books_parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+
+    students_parser = subparsers.add_parser("students", help="Enrol students")
+    students_parser.add_argument("path", type=Path)
+    students_parser.add_argument("--format", choices=FORMATS)
+    students_parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    from backend.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        with args.path.open(encoding="utf-8-sig", newline="") as stream:
+            records = iter_records(stream, detect_format(args.path, args.format))
+            if args.kind == "books":
+                report = import_books(db, records, upsert=args.upsert, chunk_size=args.chunk_size)
+            else:
+                report = import_students(db, records, chunk_size=args.chunk_size)
+    finally:
+        db.close()
+
+    print(f"Inserted: {report['inserted']}  Updated: {report['updated']}  Failed: {report['failed']}")
+    for error in report["errors"]:
+        print(f"  row {error['row']}: {error['detail']}")
+
+
+if __name__ == "__main__":
+    main()
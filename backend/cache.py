@@ -0,0 +1,137 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+from urllib.parse import urlencode
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from backend.config import DASHBOARD_CACHE_SECONDS, RESPONSE_CACHE_SIZE
+from backend.models import ResourceVersion
+
+# Resource families. A write bumps every family whose reads it can change.
+SECTIONS = "sections"
+BOOKS = "books"
+STUDENTS = "students"
+BORROWS = "borrows"
+ALL_FAMILIES = (SECTIONS, BOOKS, STUDENTS, BORROWS)
+
+
+def ensure_versions(db: Session) -> None:
+    """Create the counter rows up front so concurrent first writes only UPDATE."""
+    existing = {name for (name,) in db.query(ResourceVersion.name).all()}
+    missing = [ResourceVersion(name=name, version=0) for name in ALL_FAMILIES if name not in existing]
+    if missing:
+        db.add_all(missing)
+        db.commit()
+
+
+def bump_versions(db: Session, *families: str) -> None:
+    """Advance the version of each family in the caller's transaction."""
+    for name in families:
+        result = db.execute(
+            update(ResourceVersion)
+            .where(ResourceVersion.name == name)
+            .values(version=ResourceVersion.version + 1)
+        )
+        if result.rowcount == 0:
+            db.add(ResourceVersion(name=name, version=1))
+    db.flush()
+
+
+def read_versions(db: Session, families: Iterable[str]) -> Tuple[int, ...]:
+    families = tuple(families)
+    found = dict(
+        db.query(ResourceVersion.name, ResourceVersion.version)
+        .filter(ResourceVersion.name.in_(families))
+        .all()
+    )
+    return tuple(found.get(name, 0) for name in families)
+
+
+def dashboard_bucket() -> int:
+    return int(time.time() // DASHBOARD_CACHE_SECONDS)
+
+
+class ResponseCache:
+    """Thread-safe LRU of rendered bodies, one slot per path and query string.
+
+    Each slot remembers the versions it was rendered at, so a write anywhere
+    (in this process or another) invalidates it on the next read.
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[str, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, str], etag: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != etag:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key: Tuple[str, str], etag: str, body: bytes) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (etag, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+response_cache = ResponseCache(RESPONSE_CACHE_SIZE)
+_adapters: Dict[Any, TypeAdapter] = {}
+
+
+def _render(response_model: Any, payload: Any) -> bytes:
+    adapter = _adapters.get(response_model)
+    if adapter is None:
+        adapter = _adapters[response_model] = TypeAdapter(response_model)
+    return adapter.dump_json(adapter.validate_python(payload))
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Weak comparison, as If-None-Match requires.
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+
+def cached_json(
+    request: Request,
+    db: Session,
+    families: Iterable[str],
+    response_model: Any,
+    build: Callable[[Session], Any],
+    bucket: Optional[int] = None,
+) -> Response:
+    """Serve a read through its ETag: 304, cached body, or a fresh render."""
+    key = (request.url.path, urlencode(sorted(request.query_params.multi_items())))
+    versions = read_versions(db, families)
+    digest = hashlib.blake2b(repr((key, versions, bucket)).encode("utf-8"), digest_size=8).hexdigest()
+    etag = f'W/"{digest}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    body = response_cache.get(key, etag)
+    if body is None:
+        body = _render(response_model, build(db))
+        response_cache.put(key, etag, body)
+    return Response(content=body, media_type="application/json", headers=headers)
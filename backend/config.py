@@ -8,11 +8,119 @@ DEFAULT_DB_PATH = BASE_DIR / "library.db"
 # Allow override in production deployments.
 DATABASE_URL = os.getenv("DATABASE_URL", f"sqlite:///{DEFAULT_DB_PATH.as_posix()}")
 
+# Optional read replica for GET/HEAD traffic. After a write, the same client
+# keeps reading from the primary for READ_YOUR_WRITES_SECONDS.
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL") or None
+READ_YOUR_WRITES_SECONDS = int(os.getenv("READ_YOUR_WRITES_SECONDS", "10"))
+
+# Connection pool for file-backed databases (ignored for in-memory SQLite).
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+# Sync routes run on anyio's worker threads; by default there is one per pooled
+# connection so a worker never parks waiting for the pool.
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", str(DB_POOL_SIZE + DB_MAX_OVERFLOW)))
+
+# SQLite pragmas applied to every new connection. SQLITE_PROFILE=default keeps
+# SQLite's stock settings (rollback journal, synchronous=FULL, no busy wait).
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "tuned").strip().lower()
+SQLITE_PROFILES = {
+    "default": {},
+    "tuned": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+        "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+        # Negative cache_size is in KiB rather than pages.
+        "cache_size": -int(os.getenv("SQLITE_CACHE_SIZE_KB", str(64 * 1024))),
+        "temp_store": "MEMORY",
+    },
+}
+
+# Serve routes from an AsyncSession instead of the sync threadpool path.
+ASYNC_DATABASE = os.getenv("ASYNC_DATABASE", "0").strip().lower() in ("1", "true", "yes")
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+}
+
+
+def _async_url(url: str) -> str:
+    scheme, _, rest = url.partition("://")
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}://{rest}"
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", _async_url(DATABASE_URL))
+ASYNC_DATABASE_REPLICA_URL = os.getenv(
+    "ASYNC_DATABASE_REPLICA_URL",
+    _async_url(DATABASE_REPLICA_URL) if DATABASE_REPLICA_URL else "",
+) or None
+
 # Business rules.
 FINE_PER_DAY = 500
 DEFAULT_BORROW_DAYS = 7
 MAX_BORROW_DAYS = 30
 
+# The overdue sweep runs in-process every OVERDUE_SWEEP_INTERVAL seconds (0 turns
+# the scheduler off, e.g. when cron runs `python -m backend.overdue`). Reads never
+# sweep; stored overdue state lags the clock by at most one interval.
+OVERDUE_SWEEP_INTERVAL = int(os.getenv("OVERDUE_SWEEP_INTERVAL", "60"))
+
+# `python -m backend.archive` moves loans returned more than ARCHIVE_AFTER_DAYS
+# ago into borrow_history, ARCHIVE_BATCH_SIZE rows per transaction.
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "180"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "1000"))
+
+# List endpoints return pages of at most this many rows.
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Typeahead lookups return a small, capped projection.
+DEFAULT_LOOKUP_LIMIT = 10
+MAX_LOOKUP_LIMIT = 50
+
+# Checkout desks may submit at most this many scans per batch request.
+MAX_BATCH_SIZE = 200
+
+# Bulk imports commit every chunk and report at most this many row errors.
+IMPORT_CHUNK_SIZE = 1000
+IMPORT_MAX_ERRORS = 1000
+
+# Streaming exports fetch and flush this many rows at a time.
+EXPORT_BATCH_SIZE = 1000
+
+# Responses larger than this many bytes are gzip-compressed for clients that
+# accept it; 0 turns compression off. Level 1 already shrinks JSON pages ~8x
+# at a fraction of the CPU of the default level 9.
+GZIP_MINIMUM_SIZE = int(os.getenv("GZIP_MINIMUM_SIZE", "1024"))
+GZIP_COMPRESS_LEVEL = int(os.getenv("GZIP_COMPRESS_LEVEL", "1"))
+
+# Read endpoints keep this many rendered responses per process. The dashboard's
+# overdue figures move with the clock, so its ETag also rolls over on this interval.
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "256"))
+DASHBOARD_CACHE_SECONDS = int(os.getenv("DASHBOARD_CACHE_SECONDS", "30"))
+
+# Request timing, pool checkout and SQL statement metrics, served on /metrics.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1").strip().lower() in ("1", "true", "yes")
+
+# Routes with a declared query budget (backend/query_budget.py) are checked for
+# going over it and for repeating one SELECT shape QUERY_REPEAT_THRESHOLD times
+# (the N+1 pattern). "warn" logs the offence, "raise" fails the request at the
+# offending statement (for tests), "off" skips the checks.
+QUERY_BUDGET_MODE = os.getenv("QUERY_BUDGET_MODE", "warn").strip().lower()
+QUERY_REPEAT_THRESHOLD = int(os.getenv("QUERY_REPEAT_THRESHOLD", "5"))
+
+# On-demand profiling. With PROFILING_ENABLED=1, a request sent with an
+# `X-Profile: 1` header or `?profile=1` is stack-sampled every
+# PROFILE_INTERVAL_MS. Its folded stacks (flamegraph.pl / speedscope input) are
+# written to PROFILE_DIR. When disabled, no middleware is installed.
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "0").strip().lower() in ("1", "true", "yes")
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", str(BASE_DIR / "profiles")))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "1"))
+
 # Fixed library sections required by the system.
 LIBRARY_SECTIONS = [
     "SCIENCES",
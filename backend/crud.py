@@ -1,18 +1,30 @@
+import heapq
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
 
 from fastapi import HTTPException, status
-from sqlalchemy import func
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import and_, case, func, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Query, Session, joinedload
 
+from backend.cache import BOOKS, BORROWS, SECTIONS, STUDENTS, bump_versions
 from backend.config import (
     DEFAULT_BORROW_DAYS,
+    DEFAULT_LOOKUP_LIMIT,
+    DEFAULT_PAGE_SIZE,
+    EXPORT_BATCH_SIZE,
     FINE_PER_DAY,
     LIBRARY_SECTIONS,
+    MAX_BATCH_SIZE,
     MAX_BORROW_DAYS,
 )
-from backend.models import Book, BorrowRecord, Section, Student
+from backend.models import Book, BorrowHistory, BorrowRecord, Section, Student
+from backend.pagination import decode_cursor, encode_cursor, invalid_cursor
+from backend.search import FTS_RANKED_MATCHES, fts_available, match_expression, search_terms
 from backend.schemas import BookCreate, BorrowCreate, StudentCreate
+from backend.stats import bump_stats, read_stats
+
+ALREADY_BORROWED = "Student already has this book and has not returned it"
 
 
 def ensure_sections(db: Session) -> None:
@@ -21,6 +33,8 @@ def ensure_sections(db: Session) -> None:
     missing = [Section(name=name) for name in LIBRARY_SECTIONS if name not in existing_names]
     if missing:
         db.add_all(missing)
+        bump_stats(db, total_sections=len(missing))
+        bump_versions(db, SECTIONS)
         db.commit()
 
 
@@ -30,6 +44,58 @@ def _overdue_days(due_at: datetime, reference_time: datetime) -> int:
     return (reference_time.date() - due_at.date()).days
 
 
+def _outstanding_fine_column(model: Any = BorrowRecord) -> Any:
+    """Per-row outstanding fine: settled fine once returned, else the swept accrual."""
+    return case(
+        (model.returned_at.isnot(None), model.fine_amount),
+        else_=model.accrued_fine,
+    )
+
+
+def _is_archived(db: Session, borrow_ids: List[int]) -> Set[int]:
+    """Ids among `borrow_ids` that the archive job moved to history."""
+    return {
+        borrow_id
+        for (borrow_id,) in db.query(BorrowHistory.id).filter(BorrowHistory.id.in_(set(borrow_ids)))
+    }
+
+
+def _keyset_page(
+    query: Query,
+    sort_column: Any,
+    id_column: Any,
+    after: Optional[str],
+    limit: int,
+    descending: bool = False,
+) -> Query:
+    # Seek past the cursor on (sort_column, id) so every page costs the same.
+    cursor = decode_cursor(after, sort_column.type.python_type)
+    if cursor is not None:
+        sort_value, row_id = cursor
+        if descending:
+            query = query.filter(
+                or_(sort_column < sort_value, and_(sort_column == sort_value, id_column < row_id))
+            )
+        else:
+            query = query.filter(
+                or_(sort_column > sort_value, and_(sort_column == sort_value, id_column > row_id))
+            )
+
+    if descending:
+        query = query.order_by(sort_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(sort_column.asc(), id_column.asc())
+    # Fetch one extra row to learn whether another page exists.
+    return query.limit(limit + 1)
+
+
+def _page_result(rows: List[Any], limit: int, cursor_key: Any, serialize: Any) -> Dict[str, Any]:
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_cursor(*cursor_key(rows[-1])) if has_more else None
+    return {"items": [serialize(row) for row in rows], "next_cursor": next_cursor}
+
+
 def _update_book_status(book: Book) -> None:
     # Clamp copies so status and inventory cannot drift apart.
     if book.available_copies < 0:
@@ -54,67 +120,207 @@ def _serialize_book(book: Book) -> Dict[str, Any]:
     }
 
 
-def _serialize_borrow(record: BorrowRecord, now: Optional[datetime] = None) -> Dict[str, Any]:
-    now = now or datetime.now()
-    is_returned = record.returned_at is not None
-    is_overdue = (not is_returned) and (now > record.due_at)
+# List endpoints select these columns as plain tuples; `_book_row_response`
+# zips them straight into the BookOut shape without hydrating ORM objects.
+BOOK_FIELDS = (
+    "id",
+    "title",
+    "author",
+    "version",
+    "cost",
+    "total_copies",
+    "available_copies",
+    "status",
+    "section_id",
+    "section_name",
+)
 
-    if is_returned:
-        status_name = "RETURNED"
-        outstanding_fine = float(record.fine_amount)
-    elif is_overdue:
-        status_name = "OVERDUE"
-        outstanding_fine = float(_overdue_days(record.due_at, now) * FINE_PER_DAY)
-    else:
-        status_name = "BORROWED"
-        outstanding_fine = 0.0
+
+def _book_rows(db: Session) -> Query:
+    return db.query(
+        Book.id,
+        Book.title,
+        Book.author,
+        Book.version,
+        Book.cost,
+        Book.total_copies,
+        Book.available_copies,
+        Book.status,
+        Book.section_id,
+        func.coalesce(Section.name, ""),
+    ).outerjoin(Section, Section.id == Book.section_id)
+
+
+def _book_row_response(row: Any) -> Dict[str, Any]:
+    return dict(zip(BOOK_FIELDS, row))
+
+
+def _borrow_response(
+    *,
+    record_id: int,
+    matric_number: Optional[str],
+    student_name: Optional[str],
+    book_id: int,
+    book_title: Optional[str],
+    section_name: Optional[str],
+    borrowed_at: datetime,
+    due_at: datetime,
+    lend_days: int,
+    returned_at: Optional[datetime],
+    fine_amount: float,
+    now: datetime,
+    outstanding_fine: Optional[float] = None,
+    status_name: Optional[str] = None,
+) -> Dict[str, Any]:
+    is_returned = returned_at is not None
+    is_overdue = (not is_returned) and (now > due_at)
+
+    # List queries pass the swept status and fine, the same columns that drive
+    # only_overdue, defaulters and the dashboard; single-record paths fall back to Python.
+    if status_name is None:
+        if is_returned:
+            status_name = "RETURNED"
+        elif is_overdue:
+            status_name = "OVERDUE"
+        else:
+            status_name = "BORROWED"
+
+    if outstanding_fine is None:
+        if is_returned:
+            outstanding_fine = float(fine_amount)
+        elif is_overdue:
+            outstanding_fine = float(_overdue_days(due_at, now) * FINE_PER_DAY)
+        else:
+            outstanding_fine = 0.0
 
     return {
-        "id": record.id,
-        "student_id": record.student.matric_number if record.student else "",
-        "student_name": record.student.full_name if record.student else "",
-        "matric_number": record.student.matric_number if record.student else "",
-        "book_id": record.book_id,
-        "book_title": record.book.title if record.book else "",
-        "section_name": record.book.section.name if record.book and record.book.section else "",
-        "borrowed_at": record.borrowed_at,
-        "due_at": record.due_at,
-        "lend_days": record.lend_days,
-        "returned_at": record.returned_at,
-        "fine_amount": float(record.fine_amount),
+        "id": record_id,
+        "student_id": matric_number or "",
+        "student_name": student_name or "",
+        "matric_number": matric_number or "",
+        "book_id": book_id,
+        "book_title": book_title or "",
+        "section_name": section_name or "",
+        "borrowed_at": borrowed_at,
+        "due_at": due_at,
+        "lend_days": lend_days,
+        "returned_at": returned_at,
+        "fine_amount": float(fine_amount),
         "outstanding_fine": float(outstanding_fine),
         "status": status_name,
     }
 
 
+def _adjust_available_copies(db: Session, book_id: int, delta: int, added_total: int = 0) -> Optional[int]:
+    """Atomically move a book's available copies by `delta` and return the new count.
+
+    The guard lives in the UPDATE itself (never below zero, never above the
+    total), so concurrent desks cannot oversubscribe a copy. Returns `None` when
+    the guard rejected the change or the book does not exist.
+    """
+    new_available = Book.available_copies + delta
+    statement = update(Book).where(Book.id == book_id)
+    if delta < 0:
+        statement = statement.where(Book.available_copies + delta >= 0)
+    elif added_total == 0:
+        statement = statement.where(Book.available_copies + delta <= Book.total_copies)
+    statement = statement.values(
+        available_copies=new_available,
+        total_copies=Book.total_copies + added_total,
+        status=case((new_available <= 0, "OUT_OF_STOCK"), else_="AVAILABLE"),
+    ).execution_options(synchronize_session=False)
+
+    if db.get_bind().dialect.update_returning:
+        return db.execute(statement.returning(Book.available_copies)).scalar_one_or_none()
+    if db.execute(statement).rowcount == 0:
+        return None
+    return db.query(Book.available_copies).filter(Book.id == book_id).scalar()
+
+
 def list_sections(db: Session) -> List[Dict[str, Any]]:
     rows = (
         db.query(
             Section.id.label("id"),
             Section.name.label("name"),
             func.count(Book.id).label("book_count"),
+            func.count(case((Book.available_copies > 0, Book.id))).label("available_count"),
         )
         .outerjoin(Book, Book.section_id == Section.id)
         .group_by(Section.id, Section.name)
         .order_by(Section.name.asc())
         .all()
     )
-    return [{"id": row.id, "name": row.name, "book_count": int(row.book_count)} for row in rows]
+    return [
+        {"id": row.id, "name": row.name, "book_count": int(row.book_count), "available_count": int(row.available_count)}
+        for row in rows
+    ]
 
 
 def list_books(
     db: Session,
     section_id: Optional[int] = None,
     include_out_of_stock: bool = True,
-) -> List[Dict[str, Any]]:
-    query = db.query(Book).options(joinedload(Book.section))
+    limit: int = DEFAULT_PAGE_SIZE,
+    after: Optional[str] = None,
+) -> Dict[str, Any]:
+    query = _book_rows(db)
     if section_id is not None:
         query = query.filter(Book.section_id == section_id)
     if not include_out_of_stock:
         query = query.filter(Book.available_copies > 0)
 
-    books = query.order_by(Book.title.asc()).all()
-    return [_serialize_book(book) for book in books]
+    rows = _keyset_page(query, Book.title, Book.id, after, limit).all()
+    return _page_result(rows, limit, lambda row: (row[1], row[0]), _book_row_response)
+
+
+def search_books(
+    db: Session,
+    q: str,
+    section_id: Optional[int] = None,
+    include_out_of_stock: bool = True,
+    limit: int = DEFAULT_PAGE_SIZE,
+    after: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Prefix search over title/author/version, best matches first.
+
+    Ranked results have no stable keyset, so the cursor carries an offset.
+    """
+    terms = search_terms(q)
+    if not terms:
+        return {"items": [], "next_cursor": None}
+    cursor = decode_cursor(after, int)
+    offset = cursor[0] if cursor else 0
+    if offset < 0:
+        raise invalid_cursor()
+
+    if fts_available(db):
+        matches = FTS_RANKED_MATCHES.bindparams(match=match_expression(terms)).subquery("matches")
+        query = (
+            _book_rows(db)
+            .join(matches, matches.c.book_id == Book.id)
+            .order_by(matches.c.score.asc(), Book.id.asc())
+        )
+    else:
+        query = _book_rows(db)
+        for term in terms:
+            pattern = f"%{term}%"
+            query = query.filter(
+                or_(Book.title.ilike(pattern), Book.author.ilike(pattern), Book.version.ilike(pattern))
+            )
+        query = query.order_by(Book.title.asc(), Book.id.asc())
+
+    if section_id is not None:
+        query = query.filter(Book.section_id == section_id)
+    if not include_out_of_stock:
+        query = query.filter(Book.available_copies > 0)
+
+    rows = query.offset(offset).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        "items": [_book_row_response(row) for row in rows],
+        "next_cursor": encode_cursor(offset + limit, rows[-1][0]) if has_more else None,
+    }
 
 
 def create_book(db: Session, payload: BookCreate) -> Dict[str, Any]:
@@ -150,6 +356,13 @@ def create_book(db: Session, payload: BookCreate) -> Dict[str, Any]:
     _update_book_status(book)
 
     db.add(book)
+    bump_stats(
+        db,
+        total_books=1,
+        available_books=book.available_copies,
+        out_of_stock_books=int(book.available_copies <= 0),
+    )
+    bump_versions(db, SECTIONS, BOOKS)
     db.commit()
     db.refresh(book)
     db.refresh(section)
@@ -157,30 +370,52 @@ def create_book(db: Session, payload: BookCreate) -> Dict[str, Any]:
 
 
 def add_book_stock(db: Session, book_id: int, added_copies: int) -> Dict[str, Any]:
-    book = db.query(Book).options(joinedload(Book.section)).filter(Book.id == book_id).first()
-    if not book:
+    new_available = _adjust_available_copies(db, book_id, added_copies, added_total=added_copies)
+    if new_available is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Book not found")
 
-    book.total_copies += added_copies
-    book.available_copies += added_copies
-    _update_book_status(book)
-
+    previous_available = new_available - added_copies
+    bump_stats(
+        db,
+        available_books=added_copies,
+        out_of_stock_books=int(new_available <= 0) - int(previous_available <= 0),
+    )
+    bump_versions(db, BOOKS)
     db.commit()
-    db.refresh(book)
+
+    book = db.query(Book).options(joinedload(Book.section)).filter(Book.id == book_id).one()
     return _serialize_book(book)
 
 
-def _student_outstanding_fine(student: Student, now: datetime) -> float:
-    outstanding = 0.0
-    for borrow in student.borrows:
-        if borrow.returned_at is None and now > borrow.due_at:
-            outstanding += _overdue_days(borrow.due_at, now) * FINE_PER_DAY
-    return float(outstanding)
+def _open_loans_by_student(db: Session) -> Any:
+    # One grouped pass over every open loan; only the full export wants this.
+    return (
+        db.query(
+            BorrowRecord.student_id.label("student_id"),
+            func.count(BorrowRecord.id).label("active_borrows"),
+            func.sum(BorrowRecord.accrued_fine).label("outstanding_fine"),
+        )
+        .filter(BorrowRecord.returned_at.is_(None))
+        .group_by(BorrowRecord.student_id)
+        .subquery()
+    )
+
+
+def _student_listing(db: Session) -> Query:
+    # Correlated lookups on the partial (student_id, accrued_fine) index, run
+    # only for the rows the page returns rather than aggregating every open loan.
+    open_loans = and_(BorrowRecord.student_id == Student.id, BorrowRecord.returned_at.is_(None))
+    active_borrows = select(func.count(BorrowRecord.id)).where(open_loans).correlate(Student).scalar_subquery()
+    outstanding_fine = (
+        select(func.coalesce(func.sum(BorrowRecord.accrued_fine), 0))
+        .where(open_loans)
+        .correlate(Student)
+        .scalar_subquery()
+    )
+    return db.query(Student, active_borrows, outstanding_fine)
 
 
-def _serialize_student(student: Student, now: Optional[datetime] = None) -> Dict[str, Any]:
-    now = now or datetime.now()
-    active_borrows = sum(1 for borrow in student.borrows if borrow.returned_at is None)
+def _serialize_student(student: Student, active_borrows: int, outstanding_fine: float) -> Dict[str, Any]:
     return {
         "id": student.matric_number,
         "full_name": student.full_name,
@@ -188,17 +423,28 @@ def _serialize_student(student: Student, now: Optional[datetime] = None) -> Dict
         "email": student.email,
         "department": student.department,
         "created_at": student.created_at,
-        "active_borrows": active_borrows,
-        "outstanding_fine": _student_outstanding_fine(student, now),
+        "active_borrows": int(active_borrows),
+        "outstanding_fine": float(outstanding_fine),
+    }
+
+
+def normalize_student(payload: StudentCreate) -> Dict[str, Any]:
+    """Column values for a new student, shared by single and bulk enrolment."""
+    return {
+        "full_name": payload.full_name.strip(),
+        "matric_number": payload.matric_number.strip().upper(),
+        "email": payload.email.strip().lower(),
+        "department": payload.department.strip() if payload.department else None,
     }
 
 
 def create_student(db: Session, payload: StudentCreate) -> Dict[str, Any]:
+    fields = normalize_student(payload)
     existing = (
-        db.query(Student)
+        db.query(Student.id)
         .filter(
-            (Student.matric_number == payload.matric_number.strip())
-            | (Student.email == payload.email.strip().lower())
+            (Student.matric_number == fields["matric_number"])
+            | (Student.email == fields["email"])
         )
         .first()
     )
@@ -208,29 +454,63 @@ def create_student(db: Session, payload: StudentCreate) -> Dict[str, Any]:
             detail="Student with matric number or email already exists",
         )
 
-    student = Student(
-        full_name=payload.full_name.strip(),
-        matric_number=payload.matric_number.strip().upper(),
-        email=payload.email.strip().lower(),
-        department=payload.department.strip() if payload.department else None,
-    )
+    student = Student(**fields)
     db.add(student)
+    bump_stats(db, total_students=1)
+    bump_versions(db, STUDENTS)
+    # Read before the commit expires the row; a new student has no loans yet.
+    db.flush()
+    result = _serialize_student(student, 0, 0)
     db.commit()
-    db.refresh(student)
+    return result
 
-    student = db.query(Student).options(joinedload(Student.borrows)).filter(Student.id == student.id).first()
-    return _serialize_student(student)
 
-
-def list_students(db: Session) -> List[Dict[str, Any]]:
-    students = (
-        db.query(Student)
-        .options(joinedload(Student.borrows))
-        .order_by(Student.full_name.asc())
-        .all()
+def list_students(
+    db: Session,
+    limit: int = DEFAULT_PAGE_SIZE,
+    after: Optional[str] = None,
+) -> Dict[str, Any]:
+    query = _student_listing(db)
+    rows = _keyset_page(query, Student.full_name, Student.id, after, limit).all()
+    return _page_result(
+        rows,
+        limit,
+        lambda row: (row[0].full_name, row[0].id),
+        lambda row: _serialize_student(*row),
     )
-    now = datetime.now()
-    return [_serialize_student(student, now=now) for student in students]
+
+
+def _prefix_range(column: Any, prefix: str) -> Any:
+    # A half-open range instead of LIKE, so the column's b-tree index is used.
+    return and_(column >= prefix, column < prefix + chr(0x10FFFF))
+
+
+def lookup_students(db: Session, prefix: str, limit: int = DEFAULT_LOOKUP_LIMIT) -> List[Dict[str, Any]]:
+    """Typeahead match on matric number, name or email prefix."""
+    prefix = prefix.strip()
+    if not prefix:
+        return []
+    # Matric numbers are stored upper-case and emails lower-case; names are
+    # matched as typed and capitalised.
+    ranges = [(Student.matric_number, prefix.upper()), (Student.email, prefix.lower())]
+    ranges += [(Student.full_name, name) for name in {prefix, prefix[:1].upper() + prefix[1:], prefix.title()}]
+
+    # One capped index walk per column keeps short prefixes from sorting every
+    # match; the handful of candidates is merged here.
+    matches: Dict[str, Tuple[str, str, str]] = {}
+    for column, value in ranges:
+        for matric_number, full_name, email in (
+            db.query(Student.matric_number, Student.full_name, Student.email)
+            .filter(_prefix_range(column, value))
+            .order_by(column.asc())
+            .limit(limit)
+        ):
+            matches[matric_number] = (matric_number, full_name, email)
+
+    return [
+        {"id": matric_number, "full_name": full_name, "matric_number": matric_number, "email": email}
+        for matric_number, full_name, email in sorted(matches.values(), key=lambda row: (row[1], row[0]))[:limit]
+    ]
 
 
 def borrow_book(db: Session, payload: BorrowCreate) -> Dict[str, Any]:
@@ -242,18 +522,25 @@ def borrow_book(db: Session, payload: BorrowCreate) -> Dict[str, Any]:
         )
 
     student_key = payload.student_id.strip().upper()
-    student = db.query(Student).filter(Student.matric_number == student_key).first()
+    student = (
+        db.query(Student.id, Student.full_name, Student.matric_number)
+        .filter(Student.matric_number == student_key)
+        .first()
+    )
     if not student:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Student not found")
 
-    book = db.query(Book).options(joinedload(Book.section)).filter(Book.id == payload.book_id).first()
+    book = (
+        db.query(Book.title, Section.name)
+        .outerjoin(Section, Section.id == Book.section_id)
+        .filter(Book.id == payload.book_id)
+        .first()
+    )
     if not book:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Book not found")
-    if book.available_copies <= 0:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Book is out of stock")
 
     already_borrowed = (
-        db.query(BorrowRecord)
+        db.query(BorrowRecord.id)
         .filter(
             BorrowRecord.student_id == student.id,
             BorrowRecord.book_id == payload.book_id,
@@ -262,150 +549,552 @@ def borrow_book(db: Session, payload: BorrowCreate) -> Dict[str, Any]:
         .first()
     )
     if already_borrowed:
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail="Student already has this book and has not returned it",
-        )
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=ALREADY_BORROWED)
+
+    # The conditional decrement is the source of truth for stock, not a prior read.
+    new_available = _adjust_available_copies(db, payload.book_id, -1)
+    if new_available is None:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Book is out of stock")
 
     borrowed_at = datetime.now()
+    due_at = borrowed_at + timedelta(days=lend_days)
     borrow_record = BorrowRecord(
         student_id=student.id,
         book_id=payload.book_id,
         borrowed_at=borrowed_at,
-        due_at=borrowed_at + timedelta(days=lend_days),
+        due_at=due_at,
         lend_days=lend_days,
     )
-
-    book.available_copies -= 1
-    _update_book_status(book)
-
     db.add(borrow_record)
+    try:
+        db.flush()
+    except IntegrityError:
+        # A concurrent borrow opened the same loan after the check above;
+        # the unique open-loan index turned it away.
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=ALREADY_BORROWED)
+    record_id = borrow_record.id
+
+    bump_stats(
+        db,
+        active_borrows=1,
+        available_books=-1,
+        out_of_stock_books=int(new_available <= 0),
+    )
+    bump_versions(db, BOOKS, STUDENTS, BORROWS)
     db.commit()
-    db.refresh(borrow_record)
 
-    borrow_record = (
-        db.query(BorrowRecord)
-        .options(
-            joinedload(BorrowRecord.student),
-            joinedload(BorrowRecord.book).joinedload(Book.section),
-        )
-        .filter(BorrowRecord.id == borrow_record.id)
-        .first()
+    # Built from locals: the commit expired borrow_record, and reading it would reload the row.
+    return _borrow_response(
+        record_id=record_id,
+        matric_number=student.matric_number,
+        student_name=student.full_name,
+        book_id=payload.book_id,
+        book_title=book.title,
+        section_name=book.name,
+        borrowed_at=borrowed_at,
+        due_at=due_at,
+        lend_days=lend_days,
+        returned_at=None,
+        fine_amount=0.0,
+        now=borrowed_at,
     )
-    return _serialize_borrow(borrow_record)
 
 
 def return_book(db: Session, borrow_id: int) -> Dict[str, Any]:
-    borrow_record = (
-        db.query(BorrowRecord)
-        .options(
-            joinedload(BorrowRecord.student),
-            joinedload(BorrowRecord.book).joinedload(Book.section),
+    record = (
+        db.query(
+            BorrowRecord.book_id,
+            BorrowRecord.borrowed_at,
+            BorrowRecord.due_at,
+            BorrowRecord.lend_days,
+            BorrowRecord.returned_at,
+            Student.matric_number,
+            Student.full_name,
+            Book.title,
+            Section.name,
         )
+        .outerjoin(Student, Student.id == BorrowRecord.student_id)
+        .outerjoin(Book, Book.id == BorrowRecord.book_id)
+        .outerjoin(Section, Section.id == Book.section_id)
         .filter(BorrowRecord.id == borrow_id)
         .first()
     )
-    if not borrow_record:
+    if not record:
+        if _is_archived(db, [borrow_id]):
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Book already returned")
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Borrow record not found")
-    if borrow_record.returned_at is not None:
+    if record.returned_at is not None:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Book already returned")
 
     returned_at = datetime.now()
-    overdue_days = _overdue_days(borrow_record.due_at, returned_at)
+    fine_amount = float(_overdue_days(record.due_at, returned_at) * FINE_PER_DAY)
+
+    # Only the first of two concurrent returns can close the loan.
+    closed = db.execute(
+        update(BorrowRecord)
+        .where(BorrowRecord.id == borrow_id, BorrowRecord.returned_at.is_(None))
+        .values(
+            returned_at=returned_at,
+            fine_amount=fine_amount,
+            status="RETURNED",
+            accrued_fine=fine_amount,
+            fine_assessed_on=returned_at.date(),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if closed.rowcount == 0:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Book already returned")
 
-    borrow_record.returned_at = returned_at
-    borrow_record.fine_amount = float(overdue_days * FINE_PER_DAY)
+    new_available = _adjust_available_copies(db, record.book_id, 1)
+    bump_stats(
+        db,
+        active_borrows=-1,
+        available_books=int(new_available is not None),
+        out_of_stock_books=-int(new_available == 1),
+        total_fines_collected=fine_amount,
+    )
+    bump_versions(db, BOOKS, STUDENTS, BORROWS)
+    db.commit()
 
-    book = borrow_record.book
-    book.available_copies += 1
-    _update_book_status(book)
+    return _borrow_response(
+        record_id=borrow_id,
+        matric_number=record.matric_number,
+        student_name=record.full_name,
+        book_id=record.book_id,
+        book_title=record.title,
+        section_name=record.name,
+        borrowed_at=record.borrowed_at,
+        due_at=record.due_at,
+        lend_days=record.lend_days,
+        returned_at=returned_at,
+        fine_amount=fine_amount,
+        now=returned_at,
+    )
+
+
+def _check_batch_size(size: int) -> None:
+    if size < 1 or size > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Batch must contain between 1 and {MAX_BATCH_SIZE} items",
+        )
+
+
+def _batch_failure(index: int, status_code: int, detail: str) -> Dict[str, Any]:
+    return {"index": index, "ok": False, "status_code": status_code, "detail": detail, "borrow": None}
+
+
+def _batch_summary(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    succeeded = sum(1 for result in results if result["ok"])
+    return {"succeeded": succeeded, "failed": len(results) - succeeded, "results": results}
+
+
+def borrow_books_batch(db: Session, items: List[BorrowCreate]) -> Dict[str, Any]:
+    """Borrow several books in one transaction, reporting a result per item.
 
+    Students, books and open loans are resolved with one IN query each; only
+    the guarded stock decrement runs per item.
+    """
+    _check_batch_size(len(items))
+    try:
+        return _borrow_books_batch(db, items)
+    except IntegrityError:
+        # A concurrent borrow opened one of these loans after the open-loan
+        # read. Start over, so that read reports it as a 409 item.
+        db.rollback()
+    try:
+        return _borrow_books_batch(db, items)
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Concurrent borrows opened some of these loans; resubmit the batch",
+        )
+
+
+def _borrow_books_batch(db: Session, items: List[BorrowCreate]) -> Dict[str, Any]:
+    student_keys = {item.student_id.strip().upper() for item in items}
+    book_ids = {item.book_id for item in items}
+    students = {
+        row.matric_number: row
+        for row in db.query(Student.id, Student.full_name, Student.matric_number)
+        .filter(Student.matric_number.in_(student_keys))
+        .all()
+    }
+    books = {
+        row.id: row
+        for row in db.query(Book.id, Book.title, Section.name)
+        .outerjoin(Section, Section.id == Book.section_id)
+        .filter(Book.id.in_(book_ids))
+        .all()
+    }
+    open_loans = set(
+        db.query(BorrowRecord.student_id, BorrowRecord.book_id)
+        .filter(
+            BorrowRecord.student_id.in_([student.id for student in students.values()]),
+            BorrowRecord.book_id.in_(book_ids),
+            BorrowRecord.returned_at.is_(None),
+        )
+        .all()
+    )
+
+    borrowed_at = datetime.now()
+    results: List[Dict[str, Any]] = []
+    accepted = []
+    out_of_stock_delta = 0
+    for index, item in enumerate(items):
+        lend_days = item.lend_days or DEFAULT_BORROW_DAYS
+        student = students.get(item.student_id.strip().upper())
+        book = books.get(item.book_id)
+        if lend_days < 1 or lend_days > MAX_BORROW_DAYS:
+            results.append(
+                _batch_failure(index, status.HTTP_400_BAD_REQUEST, f"lend_days must be between 1 and {MAX_BORROW_DAYS}")
+            )
+            continue
+        if not student:
+            results.append(_batch_failure(index, status.HTTP_404_NOT_FOUND, "Student not found"))
+            continue
+        if not book:
+            results.append(_batch_failure(index, status.HTTP_404_NOT_FOUND, "Book not found"))
+            continue
+        if (student.id, book.id) in open_loans:
+            results.append(_batch_failure(index, status.HTTP_409_CONFLICT, ALREADY_BORROWED))
+            continue
+
+        new_available = _adjust_available_copies(db, book.id, -1)
+        if new_available is None:
+            results.append(_batch_failure(index, status.HTTP_400_BAD_REQUEST, "Book is out of stock"))
+            continue
+        out_of_stock_delta += int(new_available <= 0)
+        # Later items in the same batch see this loan as open.
+        open_loans.add((student.id, book.id))
+
+        record = BorrowRecord(
+            student_id=student.id,
+            book_id=book.id,
+            borrowed_at=borrowed_at,
+            due_at=borrowed_at + timedelta(days=lend_days),
+            lend_days=lend_days,
+        )
+        accepted.append((index, record, student, book))
+        results.append(None)
+
+    if accepted:
+        db.add_all([record for _, record, _, _ in accepted])
+        db.flush()
+        bump_stats(
+            db,
+            active_borrows=len(accepted),
+            available_books=-len(accepted),
+            out_of_stock_books=out_of_stock_delta,
+        )
+        bump_versions(db, BOOKS, STUDENTS, BORROWS)
+
+    # Read the flushed records before the commit expires them; afterwards each costs a SELECT.
+    for index, record, student, book in accepted:
+        results[index] = {
+            "index": index,
+            "ok": True,
+            "status_code": status.HTTP_200_OK,
+            "detail": None,
+            "borrow": _borrow_response(
+                record_id=record.id,
+                matric_number=student.matric_number,
+                student_name=student.full_name,
+                book_id=book.id,
+                book_title=book.title,
+                section_name=book.name,
+                borrowed_at=borrowed_at,
+                due_at=record.due_at,
+                lend_days=record.lend_days,
+                returned_at=None,
+                fine_amount=0.0,
+                now=borrowed_at,
+            ),
+        }
     db.commit()
-    db.refresh(borrow_record)
+    return _batch_summary(results)
+
+
+def return_books_batch(db: Session, borrow_ids: List[int]) -> Dict[str, Any]:
+    """Return several loans in one transaction, reporting a result per item."""
+    _check_batch_size(len(borrow_ids))
+
+    records = {
+        row.id: row
+        for row in db.query(
+            BorrowRecord.id,
+            BorrowRecord.book_id,
+            BorrowRecord.borrowed_at,
+            BorrowRecord.due_at,
+            BorrowRecord.lend_days,
+            BorrowRecord.returned_at,
+            Student.matric_number,
+            Student.full_name,
+            Book.title,
+            Section.name,
+        )
+        .outerjoin(Student, Student.id == BorrowRecord.student_id)
+        .outerjoin(Book, Book.id == BorrowRecord.book_id)
+        .outerjoin(Section, Section.id == Book.section_id)
+        .filter(BorrowRecord.id.in_(set(borrow_ids)))
+        .all()
+    }
+    missing = [borrow_id for borrow_id in borrow_ids if borrow_id not in records]
+    archived = _is_archived(db, missing) if missing else set()
 
-    borrow_record = (
-        db.query(BorrowRecord)
-        .options(
-            joinedload(BorrowRecord.student),
-            joinedload(BorrowRecord.book).joinedload(Book.section),
+    returned_at = datetime.now()
+    results: List[Dict[str, Any]] = []
+    closed_ids = set()
+    returned_count = 0
+    restocked = 0
+    back_in_stock = 0
+    fines_collected = 0.0
+    for index, borrow_id in enumerate(borrow_ids):
+        record = records.get(borrow_id)
+        if not record:
+            if borrow_id in archived:
+                results.append(_batch_failure(index, status.HTTP_409_CONFLICT, "Book already returned"))
+            else:
+                results.append(_batch_failure(index, status.HTTP_404_NOT_FOUND, "Borrow record not found"))
+            continue
+        if record.returned_at is not None or borrow_id in closed_ids:
+            results.append(_batch_failure(index, status.HTTP_409_CONFLICT, "Book already returned"))
+            continue
+
+        fine_amount = float(_overdue_days(record.due_at, returned_at) * FINE_PER_DAY)
+        closed = db.execute(
+            update(BorrowRecord)
+            .where(BorrowRecord.id == borrow_id, BorrowRecord.returned_at.is_(None))
+            .values(
+                returned_at=returned_at,
+                fine_amount=fine_amount,
+                status="RETURNED",
+                accrued_fine=fine_amount,
+                fine_assessed_on=returned_at.date(),
+            )
+            .execution_options(synchronize_session=False)
         )
-        .filter(BorrowRecord.id == borrow_id)
-        .first()
+        if closed.rowcount == 0:
+            results.append(_batch_failure(index, status.HTTP_409_CONFLICT, "Book already returned"))
+            continue
+        closed_ids.add(borrow_id)
+
+        new_available = _adjust_available_copies(db, record.book_id, 1)
+        returned_count += 1
+        restocked += int(new_available is not None)
+        back_in_stock += int(new_available == 1)
+        fines_collected += fine_amount
+        results.append(
+            {
+                "index": index,
+                "ok": True,
+                "status_code": status.HTTP_200_OK,
+                "detail": None,
+                "borrow": _borrow_response(
+                    record_id=borrow_id,
+                    matric_number=record.matric_number,
+                    student_name=record.full_name,
+                    book_id=record.book_id,
+                    book_title=record.title,
+                    section_name=record.name,
+                    borrowed_at=record.borrowed_at,
+                    due_at=record.due_at,
+                    lend_days=record.lend_days,
+                    returned_at=returned_at,
+                    fine_amount=fine_amount,
+                    now=returned_at,
+                ),
+            }
+        )
+
+    bump_stats(
+        db,
+        active_borrows=-returned_count,
+        available_books=restocked,
+        out_of_stock_books=-back_in_stock,
+        total_fines_collected=fines_collected,
     )
-    return _serialize_borrow(borrow_record, now=returned_at)
+    if returned_count:
+        bump_versions(db, BOOKS, STUDENTS, BORROWS)
+    db.commit()
+    return _batch_summary(results)
 
 
 def list_borrows(
     db: Session,
     only_active: bool = False,
     only_overdue: bool = False,
-) -> List[Dict[str, Any]]:
-    query = (
-        db.query(BorrowRecord)
-        .options(
-            joinedload(BorrowRecord.student),
-            joinedload(BorrowRecord.book).joinedload(Book.section),
-        )
-        .order_by(BorrowRecord.borrowed_at.desc())
-    )
-
+    limit: int = DEFAULT_PAGE_SIZE,
+    after: Optional[str] = None,
+    include_history: bool = False,
+) -> Dict[str, Any]:
     now = datetime.now()
-    if only_active:
-        query = query.filter(BorrowRecord.returned_at.is_(None))
+    query = _borrow_ledger(db)
     if only_overdue:
-        query = query.filter(BorrowRecord.returned_at.is_(None), BorrowRecord.due_at < now)
+        # Swept OVERDUE rows are always open loans; one predicate keeps the
+        # planner on the overdue partial index.
+        query = query.filter(BorrowRecord.status == "OVERDUE")
+    elif only_active:
+        query = query.filter(BorrowRecord.returned_at.is_(None))
 
-    records = query.all()
-    return [_serialize_borrow(record, now=now) for record in records]
+    rows = _keyset_page(query, BorrowRecord.borrowed_at, BorrowRecord.id, after, limit, descending=True).all()
+    # Archived loans are all returned, so only the unfiltered ledger reaches them.
+    if include_history and not (only_active or only_overdue):
+        archived = _keyset_page(
+            _borrow_ledger(db, BorrowHistory),
+            BorrowHistory.borrowed_at,
+            BorrowHistory.id,
+            after,
+            limit,
+            descending=True,
+        ).all()
+        # Each page is already in (borrowed_at, id) order; merge them and keep limit + 1.
+        rows = sorted(rows + archived, key=lambda row: (row[6], row[0]), reverse=True)[: limit + 1]
+    return _page_result(
+        rows,
+        limit,
+        lambda row: (row[6], row[0]),
+        lambda row: _ledger_row_response(row, now),
+    )
 
 
-def list_defaulters(db: Session) -> List[Dict[str, Any]]:
+def list_defaulters(
+    db: Session,
+    limit: int = DEFAULT_PAGE_SIZE,
+    after: Optional[str] = None,
+) -> Dict[str, Any]:
     # Defaulters are currently overdue borrow records not yet returned.
-    return list_borrows(db, only_active=True, only_overdue=True)
+    return list_borrows(db, only_active=True, only_overdue=True, limit=limit, after=after)
 
 
-def dashboard_summary(db: Session) -> Dict[str, Any]:
-    now = datetime.now()
+def _borrow_ledger(db: Session, model: Any = BorrowRecord) -> Query:
+    # Column projection only: no ORM hydration, one row per borrow record.
+    return (
+        db.query(
+            model.id,
+            Student.matric_number,
+            Student.full_name,
+            model.book_id,
+            Book.title,
+            Section.name,
+            model.borrowed_at,
+            model.due_at,
+            model.lend_days,
+            model.returned_at,
+            model.fine_amount,
+            _outstanding_fine_column(model),
+            model.status,
+        )
+        .outerjoin(Student, Student.id == model.student_id)
+        .outerjoin(Book, Book.id == model.book_id)
+        .outerjoin(Section, Section.id == Book.section_id)
+    )
 
-    total_sections = db.query(func.count(Section.id)).scalar() or 0
-    total_books = db.query(func.count(Book.id)).scalar() or 0
-    available_books = db.query(func.coalesce(func.sum(Book.available_copies), 0)).scalar() or 0
-    out_of_stock_books = db.query(func.count(Book.id)).filter(Book.available_copies <= 0).scalar() or 0
-    total_students = db.query(func.count(Student.id)).scalar() or 0
-    active_borrows = (
-        db.query(func.count(BorrowRecord.id))
-        .filter(BorrowRecord.returned_at.is_(None))
-        .scalar()
-        or 0
+
+def _ledger_row_response(row: Any, now: datetime) -> Dict[str, Any]:
+    return _borrow_response(
+        record_id=row[0],
+        matric_number=row[1],
+        student_name=row[2],
+        book_id=row[3],
+        book_title=row[4],
+        section_name=row[5],
+        borrowed_at=row[6],
+        due_at=row[7],
+        lend_days=row[8],
+        returned_at=row[9],
+        fine_amount=row[10],
+        now=now,
+        outstanding_fine=row[11],
+        status_name=row[12],
     )
-    overdue_borrows = (
-        db.query(func.count(BorrowRecord.id))
-        .filter(BorrowRecord.returned_at.is_(None), BorrowRecord.due_at < now)
-        .scalar()
-        or 0
+
+
+def iter_borrows_export(db: Session, include_history: bool = False) -> Iterator[Dict[str, Any]]:
+    now = datetime.now()
+    rows: Iterator[Any] = iter(_borrow_ledger(db).order_by(BorrowRecord.id.asc()).yield_per(EXPORT_BATCH_SIZE))
+    if include_history:
+        archived = _borrow_ledger(db, BorrowHistory).order_by(BorrowHistory.id.asc()).yield_per(EXPORT_BATCH_SIZE)
+        rows = heapq.merge(rows, archived, key=lambda row: row[0])
+    for row in rows:
+        yield _ledger_row_response(row, now)
+
+
+def iter_books_export(db: Session) -> Iterator[Dict[str, Any]]:
+    query = (
+        db.query(
+            Book.id,
+            Book.title,
+            Book.author,
+            Book.version,
+            Book.cost,
+            Book.total_copies,
+            Book.available_copies,
+            Book.status,
+            Book.section_id,
+            Section.name.label("section_name"),
+        )
+        .outerjoin(Section, Section.id == Book.section_id)
+        .order_by(Book.id.asc())
+        .yield_per(EXPORT_BATCH_SIZE)
     )
-    total_fines_collected = (
-        db.query(func.coalesce(func.sum(BorrowRecord.fine_amount), 0.0))
-        .filter(BorrowRecord.returned_at.isnot(None))
-        .scalar()
-        or 0.0
+    for row in query:
+        book = row._asdict()
+        book["section_name"] = book["section_name"] or ""
+        yield book
+
+
+def iter_students_export(db: Session) -> Iterator[Dict[str, Any]]:
+    open_loans = _open_loans_by_student(db)
+    query = (
+        db.query(
+            Student.matric_number,
+            Student.full_name,
+            Student.email,
+            Student.department,
+            Student.created_at,
+            func.coalesce(open_loans.c.active_borrows, 0),
+            func.coalesce(open_loans.c.outstanding_fine, 0),
+        )
+        .outerjoin(open_loans, open_loans.c.student_id == Student.id)
+        .order_by(Student.id.asc())
+        .yield_per(EXPORT_BATCH_SIZE)
     )
+    for matric_number, full_name, email, department, created_at, active_borrows, outstanding_fine in query:
+        yield {
+            "id": matric_number,
+            "full_name": full_name,
+            "matric_number": matric_number,
+            "email": email,
+            "department": department,
+            "created_at": created_at,
+            "active_borrows": int(active_borrows),
+            "outstanding_fine": float(outstanding_fine),
+        }
 
-    overdue_records = (
-        db.query(BorrowRecord)
-        .filter(BorrowRecord.returned_at.is_(None), BorrowRecord.due_at < now)
-        .all()
+
+def dashboard_summary(db: Session) -> Dict[str, Any]:
+    stats = read_stats(db)
+
+    # Overdue figures come from the swept status and accrued fines.
+    overdue_borrows, outstanding_fines = (
+        db.query(func.count(BorrowRecord.id), func.coalesce(func.sum(BorrowRecord.accrued_fine), 0))
+        .filter(BorrowRecord.status == "OVERDUE")
+        .one()
     )
-    outstanding_fines = sum(_overdue_days(record.due_at, now) * FINE_PER_DAY for record in overdue_records)
 
     return {
-        "total_sections": int(total_sections),
-        "total_books": int(total_books),
-        "available_books": int(available_books),
-        "out_of_stock_books": int(out_of_stock_books),
-        "total_students": int(total_students),
-        "active_borrows": int(active_borrows),
+        "total_sections": int(stats.total_sections),
+        "total_books": int(stats.total_books),
+        "available_books": int(stats.available_books),
+        "out_of_stock_books": int(stats.out_of_stock_books),
+        "total_students": int(stats.total_students),
+        "active_borrows": int(stats.active_borrows),
         "overdue_borrows": int(overdue_borrows),
-        "total_fines_collected": float(total_fines_collected),
+        "total_fines_collected": float(stats.total_fines_collected),
         "outstanding_fines": float(outstanding_fines),
     }
@@ -1,15 +1,101 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
-from backend.config import DATABASE_URL
+from typing import Any, Dict, Optional
 
-# `check_same_thread` is only valid for SQLite.
-engine_kwargs = {}
-if DATABASE_URL.startswith("sqlite"):
-    engine_kwargs["connect_args"] = {"check_same_thread": False}
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from backend.config import (
+    DATABASE_REPLICA_URL,
+    DATABASE_URL,
+    DB_MAX_OVERFLOW,
+    DB_POOL_RECYCLE,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+    SQLITE_PROFILE,
+    SQLITE_PROFILES,
+)
+
+
+def _is_memory_sqlite(url: str) -> bool:
+    parsed = make_url(url)
+    return parsed.database in (None, "", ":memory:") or parsed.query.get("mode") == "memory"
+
+
+def engine_options(url: str) -> Dict[str, Any]:
+    """Keyword arguments for `create_engine`/`create_async_engine` on `url`."""
+    options: Dict[str, Any] = {}
+    if url.startswith("sqlite"):
+        # `check_same_thread` is only valid for SQLite.
+        options["connect_args"] = {"check_same_thread": False}
+        if _is_memory_sqlite(url):
+            # In-memory databases use a single shared connection, not a queue pool.
+            return options
+    options.update(
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=not url.startswith("sqlite"),
+    )
+    return options
+
+
+def apply_sqlite_profile(bind: Engine, profile: str = SQLITE_PROFILE) -> None:
+    """Run the profile's PRAGMAs on every connection `bind` opens."""
+    if bind.dialect.name != "sqlite":
+        return
+    try:
+        pragmas = SQLITE_PROFILES[profile]
+    except KeyError:
+        raise ValueError(f"Unknown SQLITE_PROFILE {profile!r}; expected one of {', '.join(SQLITE_PROFILES)}")
+    if not pragmas:
+        return
+
+    @event.listens_for(bind, "connect")
+    def _set_pragmas(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+class RoutingSession(Session):
+    """Session that sends reads to `replica` once marked `info["read_only"]`.
+
+    Flushes and explicit INSERT/UPDATE/DELETE statements always go to the
+    primary bind, so a read-only request that has to repair derived data
+    (for example the stats row) still writes to the right database.
+    """
+
+    replica: Optional[Engine] = None
+
+    def get_bind(self, mapper=None, *, clause=None, **kwargs):
+        if (
+            self.replica is not None
+            and self.info.get("read_only")
+            and not self._flushing
+            and not getattr(clause, "is_dml", False)
+        ):
+            return self.replica
+        return super().get_bind(mapper, clause=clause, **kwargs)
+
+
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+apply_sqlite_profile(engine)
+
+replica_engine: Optional[Engine] = None
+if DATABASE_REPLICA_URL:
+    replica_engine = create_engine(DATABASE_REPLICA_URL, **engine_options(DATABASE_REPLICA_URL))
+    apply_sqlite_profile(replica_engine)
+
+
+class PrimaryReplicaSession(RoutingSession):
+    replica = replica_engine
 
-engine = create_engine(DATABASE_URL, **engine_kwargs)
 
 SessionLocal = sessionmaker(
+    class_=PrimaryReplicaSession,
     autocommit=False,
     autoflush=False,
     bind=engine
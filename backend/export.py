@@ -0,0 +1,70 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterator
+
+from fastapi.responses import StreamingResponse
+
+from backend import crud
+from backend.config import EXPORT_BATCH_SIZE
+from backend.database import SessionLocal
+
+EXPORTS: Dict[str, Callable[..., Iterator[Dict[str, Any]]]] = {
+    "borrows": crud.iter_borrows_export,
+    "books": crud.iter_books_export,
+    "students": crud.iter_students_export,
+}
+MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+def _json_default(value: Any) -> str:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _csv_value(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, (datetime, date)) else value
+
+
+def _encode(rows: Iterator[Dict[str, Any]], fmt: str) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = None
+    pending = 0
+    for row in rows:
+        if fmt == "csv":
+            if writer is None:
+                writer = csv.writer(buffer)
+                writer.writerow(row.keys())
+            writer.writerow([_csv_value(value) for value in row.values()])
+        else:
+            buffer.write(json.dumps(row, default=_json_default))
+            buffer.write("\n")
+        pending += 1
+        # Flush the first row immediately, then in batches.
+        if pending == 1 or pending % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _stream(kind: str, fmt: str, read_only: bool, options: Dict[str, Any]) -> Iterator[bytes]:
+    # The response outlives the request's dependencies, so the stream owns its session.
+    db = SessionLocal()
+    db.info["read_only"] = read_only
+    try:
+        yield from _encode(EXPORTS[kind](db, **options), fmt)
+    finally:
+        db.close()
+
+
+def export_response(kind: str, fmt: str, read_only: bool = False, **options: Any) -> StreamingResponse:
+    timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    return StreamingResponse(
+        _stream(kind, fmt, read_only, options),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{kind}-{timestamp}.{fmt}"'},
+    )
@@ -1,22 +1,18 @@
 import sys
 from pathlib import Path
+from typing import List
 
 # Support running this file directly: `python backend/init__db.py`.
 if __package__ in (None, ""):
     sys.path.append(str(Path(__file__).resolve().parents[1]))
 
-from backend.crud import ensure_sections
-from backend.database import Base, SessionLocal, engine
+from backend.database import engine
+from backend.migrations import upgrade
 
 
-def initialize_database() -> None:
-    # Create all tables first, then seed fixed sections.
-    Base.metadata.create_all(bind=engine)
-    db = SessionLocal()
-    try:
-        ensure_sections(db)
-    finally:
-        db.close()
+def initialize_database() -> List[str]:
+    # Create tables and seed fixed sections by applying every pending migration.
+    return upgrade(engine)
 
 
 if __name__ == "__main__":
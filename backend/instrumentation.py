@@ -0,0 +1,108 @@
+import logging
+import time
+from contextvars import ContextVar
+from typing import Any, Optional
+
+from sqlalchemy import event
+
+from backend.config import METRICS_ENABLED, QUERY_BUDGET_MODE
+from backend.metrics import (
+    IN_FLIGHT,
+    POOL_CHECKOUT,
+    QUERY_BUDGET_VIOLATIONS,
+    REQUEST_LATENCY,
+    REQUEST_STATEMENTS,
+    REQUESTS,
+    RESPONSE_SIZE,
+)
+from backend.query_budget import RequestQueries, observers
+
+logger = logging.getLogger(__name__)
+
+# Statements of the request being served. Threadpool workers run in a copy of
+# the request's context, so they see (and add to) the same tracker.
+_request_queries: ContextVar[Optional[RequestQueries]] = ContextVar("request_queries", default=None)
+
+
+def count_statement(conn, cursor, statement, parameters, context, executemany) -> None:
+    tracker = _request_queries.get()
+    if tracker is not None:
+        tracker.record(statement)
+
+
+def instrument_engine(bind: Any, name: str) -> None:
+    """Track SQL statements per request and time pool checkouts on `bind`."""
+    sync_engine = getattr(bind, "sync_engine", bind)
+    event.listen(sync_engine, "before_cursor_execute", count_statement)
+    if not METRICS_ENABLED:
+        return
+
+    # The pool has no "before checkout" event, so time the call that waits for it.
+    pool = sync_engine.pool
+    checkout = pool.connect
+
+    def timed_checkout():
+        started = time.perf_counter()
+        try:
+            return checkout()
+        finally:
+            POOL_CHECKOUT.observe(time.perf_counter() - started, name)
+
+    pool.connect = timed_checkout
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording latency, size, status and SQL statements per route.
+
+    Routes are labelled by their path template (`/return/{borrow_id}`), so
+    label cardinality stays bounded; requests that match no route share one
+    label. Routes with a query budget are also checked against it.
+    """
+
+    def __init__(self, app: Any, record_metrics: bool = METRICS_ENABLED, budget_mode: str = QUERY_BUDGET_MODE) -> None:
+        self.app = app
+        self.record_metrics = record_metrics
+        self.budget_mode = budget_mode
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        size = 0
+
+        async def send_and_measure(message) -> None:
+            nonlocal status_code, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        tracker = RequestQueries(scope, self.budget_mode)
+        token = _request_queries.set(tracker)
+        if self.record_metrics:
+            IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_and_measure)
+        finally:
+            elapsed = time.perf_counter() - started
+            _request_queries.reset(token)
+            # The router records the matched route on the shared scope.
+            route = tracker.route
+            method = scope["method"]
+            violations = tracker.violations() if self.budget_mode == "warn" else []
+            for kind, detail in violations:
+                logger.warning("%s %s over query budget (%s): %s", method, route, kind, detail)
+            if self.record_metrics:
+                IN_FLIGHT.dec()
+                REQUESTS.inc(method, route, str(status_code))
+                REQUEST_LATENCY.observe(elapsed, method, route)
+                RESPONSE_SIZE.observe(size, method, route)
+                REQUEST_STATEMENTS.observe(tracker.count, method, route)
+                for kind, _detail in violations:
+                    QUERY_BUDGET_VIOLATIONS.inc(method, route, kind)
+            for observer in observers:
+                observer(tracker)
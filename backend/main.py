@@ -1,16 +1,45 @@
+import io
+import tempfile
+from functools import partial
 from typing import List, Optional
 
-from fastapi import Depends, FastAPI, Query
+from anyio import to_thread
+from fastapi import Depends, FastAPI, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from sqlalchemy.orm import Session
-
-from backend import crud, schemas
-from backend.database import Base, SessionLocal, engine
+from starlette.concurrency import run_in_threadpool
+
+from backend import bulk_import, crud, schemas
+from backend.cache import ALL_FAMILIES, BOOKS, SECTIONS, cached_json, dashboard_bucket
+from backend.export import export_response
+from backend.instrumentation import MetricsMiddleware, instrument_engine
+from backend.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, registry as metrics_registry
+from backend.profiling import ProfilingMiddleware
+from backend.config import (
+    ASYNC_DATABASE,
+    DEFAULT_LOOKUP_LIMIT,
+    DEFAULT_PAGE_SIZE,
+    GZIP_COMPRESS_LEVEL,
+    GZIP_MINIMUM_SIZE,
+    MAX_LOOKUP_LIMIT,
+    MAX_PAGE_SIZE,
+    METRICS_ENABLED,
+    PROFILING_ENABLED,
+    QUERY_BUDGET_MODE,
+    THREADPOOL_SIZE,
+)
+from backend.database import SessionLocal, engine, replica_engine
+from backend.migrations import check_schema
+from backend.overdue import SweepScheduler
+from backend.replica import prefers_replica, route_session
+from backend.responses import FastJSONResponse
 
 app = FastAPI(
     title="Library Management API",
     version="1.0.0",
     description="API for sections, books, students, borrowing, returns, and overdue fines.",
+    default_response_class=FastJSONResponse,
 )
 
 # Allow local Streamlit app to call this API.
@@ -21,10 +50,37 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+if GZIP_MINIMUM_SIZE > 0:
+    app.add_middleware(GZipMiddleware, minimum_size=GZIP_MINIMUM_SIZE, compresslevel=GZIP_COMPRESS_LEVEL)
+
+if METRICS_ENABLED or QUERY_BUDGET_MODE != "off":
+    # Added last so it is outermost: timings and sizes include compression.
+    app.add_middleware(MetricsMiddleware)
+    instrument_engine(engine, "primary")
+    if replica_engine is not None:
+        instrument_engine(replica_engine, "replica")
+
+if PROFILING_ENABLED:
+    # Outermost, so a profile covers every other layer.
+    app.add_middleware(ProfilingMiddleware)
+
+overdue_scheduler = SweepScheduler()
+
+if ASYNC_DATABASE:
+    # Registered first so the async handlers shadow the sync ones below.
+    from backend.async_database import async_engine, async_replica_engine
+    from backend.async_routes import router as async_router
+
+    app.include_router(async_router)
+    if METRICS_ENABLED or QUERY_BUDGET_MODE != "off":
+        instrument_engine(async_engine, "async_primary")
+        if async_replica_engine is not None:
+            instrument_engine(async_replica_engine, "async_replica")
 
 
-def get_db():
+def get_db(request: Request, response: Response):
     db = SessionLocal()
+    route_session(db, request, response)
     try:
         yield db
     finally:
@@ -33,12 +89,23 @@ def get_db():
 
 @app.on_event("startup")
 def startup() -> None:
-    Base.metadata.create_all(bind=engine)
-    db = SessionLocal()
-    try:
-        crud.ensure_sections(db)
-    finally:
-        db.close()
+    # One read; schema changes and seed rows are applied by `python -m backend.migrations`.
+    check_schema(engine)
+    if replica_engine is not None:
+        # Workers never sync the replica; refuse to serve reads from one that is missing or behind.
+        check_schema(replica_engine, remedy="run `python -m backend.replica` before starting the API")
+    overdue_scheduler.start()
+
+
+@app.on_event("shutdown")
+def shutdown() -> None:
+    overdue_scheduler.stop()
+
+
+@app.on_event("startup")
+async def size_threadpool() -> None:
+    # The limiter belongs to the running event loop, so it is sized from inside it.
+    to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
 
 
 @app.get("/health")
@@ -46,9 +113,16 @@ def health() -> dict:
     return {"status": "ok"}
 
 
+if METRICS_ENABLED:
+
+    @app.get("/metrics", include_in_schema=False)
+    def metrics() -> Response:
+        return Response(metrics_registry.render(), media_type=METRICS_CONTENT_TYPE)
+
+
 @app.get("/sections", response_model=List[schemas.SectionOut])
-def get_sections(db: Session = Depends(get_db)):
-    return crud.list_sections(db)
+def get_sections(request: Request, db: Session = Depends(get_db)):
+    return cached_json(request, db, (SECTIONS, BOOKS), List[schemas.SectionOut], crud.list_sections)
 
 
 @app.post("/sections/seed", response_model=List[schemas.SectionOut])
@@ -57,13 +131,44 @@ def seed_sections(db: Session = Depends(get_db)):
     return crud.list_sections(db)
 
 
-@app.get("/books", response_model=List[schemas.BookOut])
+@app.get("/books", response_model=schemas.BookPage)
 def get_books(
+    request: Request,
     section_id: Optional[int] = Query(default=None, gt=0),
     include_out_of_stock: bool = True,
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
     db: Session = Depends(get_db),
 ):
-    return crud.list_books(db, section_id=section_id, include_out_of_stock=include_out_of_stock)
+    build = partial(
+        crud.list_books,
+        section_id=section_id,
+        include_out_of_stock=include_out_of_stock,
+        limit=limit,
+        after=after,
+    )
+    return cached_json(request, db, (BOOKS,), schemas.BookPage, build)
+
+
+@app.get("/books/search", response_model=schemas.BookPage)
+def search_books(
+    q: str = Query(..., min_length=1, max_length=200),
+    section_id: Optional[int] = Query(default=None, gt=0),
+    include_out_of_stock: bool = True,
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    return FastJSONResponse(
+        crud.search_books(
+            db,
+            q,
+            section_id=section_id,
+            include_out_of_stock=include_out_of_stock,
+            limit=limit,
+            after=after,
+        )
+    )
 
 
 @app.post("/books", response_model=schemas.BookOut)
@@ -71,14 +176,44 @@ def create_book(payload: schemas.BookCreate, db: Session = Depends(get_db)):
     return crud.create_book(db, payload)
 
 
+@app.post("/books/import", response_model=schemas.ImportReport)
+async def import_books(
+    request: Request,
+    format: str = Query(default="csv", pattern="^(csv|ndjson)$"),
+    upsert: bool = False,
+    db: Session = Depends(get_db),
+):
+    # Spool the upload to disk as it arrives, then parse it in chunks off the event loop.
+    with tempfile.TemporaryFile() as spool:
+        async for chunk in request.stream():
+            spool.write(chunk)
+        spool.seek(0)
+        stream = io.TextIOWrapper(spool, encoding="utf-8-sig", newline="")
+        records = bulk_import.iter_records(stream, format)
+        return await run_in_threadpool(bulk_import.import_books, db, records, upsert)
+
+
 @app.patch("/books/{book_id}/stock", response_model=schemas.BookOut)
 def restock_book(book_id: int, payload: schemas.StockUpdate, db: Session = Depends(get_db)):
     return crud.add_book_stock(db, book_id, payload.added_copies)
 
 
-@app.get("/students", response_model=List[schemas.StudentOut])
-def get_students(db: Session = Depends(get_db)):
-    return crud.list_students(db)
+@app.get("/students", response_model=schemas.StudentPage)
+def get_students(
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    return FastJSONResponse(crud.list_students(db, limit=limit, after=after))
+
+
+@app.get("/students/lookup", response_model=List[schemas.StudentLookupOut])
+def lookup_students(
+    prefix: str = Query(..., min_length=1, max_length=120),
+    limit: int = Query(default=DEFAULT_LOOKUP_LIMIT, ge=1, le=MAX_LOOKUP_LIMIT),
+    db: Session = Depends(get_db),
+):
+    return crud.lookup_students(db, prefix, limit=limit)
 
 
 @app.post("/students", response_model=schemas.StudentOut)
@@ -86,13 +221,40 @@ def create_student(payload: schemas.StudentCreate, db: Session = Depends(get_db)
     return crud.create_student(db, payload)
 
 
-@app.get("/borrows", response_model=List[schemas.BorrowOut])
+@app.post("/students/import", response_model=schemas.ImportReport)
+async def import_students(
+    request: Request,
+    format: str = Query(default="csv", pattern="^(csv|ndjson)$"),
+    db: Session = Depends(get_db),
+):
+    with tempfile.TemporaryFile() as spool:
+        async for chunk in request.stream():
+            spool.write(chunk)
+        spool.seek(0)
+        stream = io.TextIOWrapper(spool, encoding="utf-8-sig", newline="")
+        records = bulk_import.iter_records(stream, format)
+        return await run_in_threadpool(bulk_import.import_students, db, records)
+
+
+@app.get("/borrows", response_model=schemas.BorrowPage)
 def get_borrows(
     only_active: bool = False,
     only_overdue: bool = False,
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    include_history: bool = False,
     db: Session = Depends(get_db),
 ):
-    return crud.list_borrows(db, only_active=only_active, only_overdue=only_overdue)
+    return FastJSONResponse(
+        crud.list_borrows(
+            db,
+            only_active=only_active,
+            only_overdue=only_overdue,
+            limit=limit,
+            after=after,
+            include_history=include_history,
+        )
+    )
 
 
 @app.post("/borrow", response_model=schemas.BorrowOut)
@@ -100,16 +262,51 @@ def borrow(payload: schemas.BorrowCreate, db: Session = Depends(get_db)):
     return crud.borrow_book(db, payload)
 
 
+@app.post("/borrow/batch", response_model=schemas.BatchResult)
+def borrow_batch(payload: schemas.BorrowBatchCreate, db: Session = Depends(get_db)):
+    return crud.borrow_books_batch(db, payload.items)
+
+
+@app.post("/return/batch", response_model=schemas.BatchResult)
+def return_batch(payload: schemas.ReturnBatchCreate, db: Session = Depends(get_db)):
+    return crud.return_books_batch(db, payload.borrow_ids)
+
+
 @app.post("/return/{borrow_id}", response_model=schemas.BorrowOut)
 def return_book(borrow_id: int, db: Session = Depends(get_db)):
     return crud.return_book(db, borrow_id)
 
 
-@app.get("/defaulters", response_model=List[schemas.BorrowOut])
-def get_defaulters(db: Session = Depends(get_db)):
-    return crud.list_defaulters(db)
+@app.get("/defaulters", response_model=schemas.BorrowPage)
+def get_defaulters(
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    return FastJSONResponse(crud.list_defaulters(db, limit=limit, after=after))
+
+
+@app.get("/export/borrows")
+def export_borrows(
+    request: Request,
+    format: str = Query(default="csv", pattern="^(csv|ndjson)$"),
+    include_history: bool = False,
+):
+    return export_response("borrows", format, read_only=prefers_replica(request), include_history=include_history)
+
+
+@app.get("/export/books")
+def export_books(request: Request, format: str = Query(default="csv", pattern="^(csv|ndjson)$")):
+    return export_response("books", format, read_only=prefers_replica(request))
+
+
+@app.get("/export/students")
+def export_students(request: Request, format: str = Query(default="csv", pattern="^(csv|ndjson)$")):
+    return export_response("students", format, read_only=prefers_replica(request))
 
 
 @app.get("/dashboard", response_model=schemas.DashboardOut)
-def get_dashboard(db: Session = Depends(get_db)):
-    return crud.dashboard_summary(db)
+def get_dashboard(request: Request, db: Session = Depends(get_db)):
+    return cached_json(
+        request, db, ALL_FAMILIES, schemas.DashboardOut, crud.dashboard_summary, bucket=dashboard_bucket()
+    )
@@ -0,0 +1,223 @@
+import argparse
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+# Support running this file directly: `python backend/migrations.py`.
+if __package__ in (None, ""):
+    sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy import MetaData, func, insert, inspect, select
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import IntegrityError, OperationalError, ProgrammingError
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateColumn, CreateTable
+
+from backend import schema_v1
+from backend.cache import ensure_versions
+from backend.crud import ensure_sections
+from backend.database import engine
+from backend.models import SchemaVersion
+from backend.overdue import sweep_overdue
+
+
+class SchemaVersionError(RuntimeError):
+    """The database schema is not at the version this code expects."""
+
+
+def apply_columns(connection: Connection, metadata: MetaData) -> List[str]:
+    """Add columns declared in `metadata` that existing tables are missing.
+
+    New columns need a server default (or to be nullable) so the ALTER can
+    fill rows that already exist.
+    """
+    inspector = inspect(connection)
+    added = []
+    for table in metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            ddl = CreateColumn(column).compile(dialect=connection.dialect)
+            connection.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {ddl}")
+            added.append(f"{table.name}.{column.name}")
+    return added
+
+
+def apply_indexes(connection: Connection, metadata: MetaData) -> List[str]:
+    """Create any index declared in `metadata` that the database is missing.
+
+    `create_all` only builds indexes together with brand-new tables, so
+    databases created before an index was added need this step.
+    """
+    inspector = inspect(connection)
+    created = []
+    for table in metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in sorted(table.indexes, key=lambda item: item.name):
+            if index.name not in existing:
+                index.create(bind=connection)
+                created.append(index.name)
+    return created
+
+
+def _create_search_index(connection: Connection) -> List[str]:
+    if connection.dialect.name != "sqlite":
+        return []
+    if connection.exec_driver_sql("SELECT 1 FROM sqlite_master WHERE name = 'books_fts'").first():
+        return []
+    try:
+        # Builds without FTS5 keep using the LIKE fallback.
+        with connection.begin_nested():
+            for statement in schema_v1.FTS_DDL:
+                connection.exec_driver_sql(statement)
+    except OperationalError:
+        return []
+    return ["books_fts"]
+
+
+def _baseline(connection: Connection) -> List[str]:
+    """Schema version 1 (backend/schema_v1.py), also completing pre-versioning databases."""
+    schema_v1.metadata.create_all(bind=connection)
+    applied = apply_columns(connection, schema_v1.metadata)
+    if any(name.startswith("borrow_records.") for name in applied):
+        # Backfill the swept overdue state for loans recorded before it existed.
+        with Session(bind=connection) as db:
+            sweep_overdue(db, full=True)
+    applied += apply_indexes(connection, schema_v1.metadata)
+    return applied + _create_search_index(connection)
+
+
+def _seed_reference_rows(connection: Connection) -> List[str]:
+    """The fixed library sections and the cache version counters."""
+    with Session(bind=connection) as db:
+        ensure_sections(db)
+        ensure_versions(db)
+    return []
+
+
+def _seed_sweep_marker(connection: Connection) -> List[str]:
+    """Run a full overdue sweep, which also writes the overdue_sweeps marker row."""
+    with Session(bind=connection) as db:
+        sweep_overdue(db, full=True)
+    return []
+
+
+def _unique_open_loans(connection: Connection) -> List[str]:
+    """One open loan per student and book, enforced by a unique partial index."""
+    duplicates = connection.exec_driver_sql(
+        "SELECT COUNT(*) FROM (SELECT 1 FROM borrow_records WHERE returned_at IS NULL "
+        "GROUP BY student_id, book_id HAVING COUNT(*) > 1) AS pairs"
+    ).scalar()
+    if duplicates:
+        raise SchemaVersionError(
+            f"{duplicates} student/book pairs have more than one open loan; "
+            "return the extra loans, then run the migrations again."
+        )
+    connection.exec_driver_sql(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_borrow_records_open_loan "
+        "ON borrow_records (student_id, book_id) WHERE returned_at IS NULL"
+    )
+    return ["ux_borrow_records_open_loan"]
+
+
+# Applied in order, each in one transaction together with its schema_version
+# row. Add a change as a new step with the next number; never edit or
+# renumber a step that has shipped, and never build tables from the live models.
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], List[str]]]] = [
+    (1, "baseline schema", _baseline),
+    (2, "seed sections and cache versions", _seed_reference_rows),
+    (3, "seed overdue sweep marker", _seed_sweep_marker),
+    (4, "unique open loan per student and book", _unique_open_loans),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(bind: Engine) -> int:
+    """Highest applied migration; 0 for a database that predates schema_version."""
+    try:
+        with bind.connect() as connection:
+            return connection.execute(select(func.max(SchemaVersion.version))).scalar() or 0
+    except (OperationalError, ProgrammingError):
+        # Only a missing table means "unversioned"; anything else is a real failure.
+        if inspect(bind).has_table(SchemaVersion.__tablename__):
+            raise
+        return 0
+
+
+def check_schema(bind: Engine, remedy: str = "run `python -m backend.migrations` first") -> int:
+    """Fail fast unless the database is exactly at SCHEMA_VERSION; one query when it is."""
+    version = current_version(bind)
+    if version < SCHEMA_VERSION:
+        raise SchemaVersionError(
+            f"Database schema is at version {version} but this code needs {SCHEMA_VERSION}; {remedy}."
+        )
+    if version > SCHEMA_VERSION:
+        raise SchemaVersionError(
+            f"Database schema is at version {version}, newer than this code ({SCHEMA_VERSION}); "
+            "deploy the matching release."
+        )
+    return version
+
+
+def _apply(bind: Engine, number: int, name: str, step: Callable[[Connection], List[str]]) -> Optional[List[str]]:
+    """Run one step; None if another process already applied it."""
+    with bind.connect() as connection:
+        transaction = connection.begin()
+        try:
+            # Claim the version first. A concurrent runner blocks on this row
+            # until the claimant commits, then fails the primary key and skips.
+            connection.execute(insert(SchemaVersion).values(version=number, name=name, applied_at=datetime.now()))
+        except IntegrityError:
+            transaction.rollback()
+            return None
+        try:
+            created = step(connection)
+        except BaseException:
+            transaction.rollback()
+            raise
+        transaction.commit()
+        return created
+
+
+def upgrade(bind: Engine) -> List[str]:
+    """Apply every pending migration in order; returns one line per step applied."""
+    with bind.begin() as connection:
+        connection.execute(CreateTable(SchemaVersion.__table__, if_not_exists=True))
+    version = current_version(bind)
+    applied = []
+    for number, name, step in MIGRATIONS:
+        if number <= version:
+            continue
+        created = _apply(bind, number, name, step)
+        if created is not None:
+            applied.append(f"{number} {name}" + (f" ({', '.join(created)})" if created else ""))
+    return applied
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Apply pending schema migrations.")
+    parser.add_argument("--check", action="store_true", help="Only report the version; exit 1 if migrations are pending")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        try:
+            print(f"Schema version {check_schema(engine)} is current.")
+        except SchemaVersionError as exc:
+            print(exc)
+            sys.exit(1)
+        return
+
+    applied = upgrade(engine)
+    for line in applied:
+        print(f"Applied {line}")
+    print(f"Schema is at version {SCHEMA_VERSION}." if applied else "Schema is up to date.")
+
+
+if __name__ == "__main__":
+    main()
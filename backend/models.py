@@ -1,12 +1,15 @@
 from datetime import datetime
 from sqlalchemy import (
     Column,
+    Date,
     DateTime,
     Float,
     ForeignKey,
+    Index,
     Integer,
     String,
     UniqueConstraint,
+    text,
 )
 from sqlalchemy.orm import relationship
 from backend.database import Base
@@ -24,6 +27,10 @@ class Book(Base):
     __tablename__ = "books"
     __table_args__ = (
         UniqueConstraint("title", "author", "version", "section_id", name="uq_book_identity"),
+        # Catalogue listings sort by title and page on (title, id), optionally per section.
+        Index("ix_books_title_id", "title", "id"),
+        Index("ix_books_section_title_id", "section_id", "title", "id"),
+        Index("ix_books_available_copies", "available_copies"),
     )
 
     id = Column(Integer, primary_key=True)
@@ -45,6 +52,9 @@ class Book(Base):
 
 class Student(Base):
     __tablename__ = "students"
+    __table_args__ = (
+        Index("ix_students_full_name_id", "full_name", "id"),
+    )
 
     id = Column(Integer, primary_key=True)
     full_name = Column(String, nullable=False)
@@ -56,8 +66,66 @@ class Student(Base):
     borrows = relationship("BorrowRecord", back_populates="student")
 
 
+# Partial indexes split open loans from returned ones, which keeps the hot one small.
+ACTIVE_BORROW = text("returned_at IS NULL")
+RETURNED_BORROW = text("returned_at IS NOT NULL")
+OVERDUE_BORROW = text("status = 'OVERDUE'")
+
+
 class BorrowRecord(Base):
     __tablename__ = "borrow_records"
+    __table_args__ = (
+        Index("ix_borrow_records_borrowed_at_id", "borrowed_at", "id"),
+        Index("ix_borrow_records_student_book_returned", "student_id", "book_id", "returned_at"),
+        # A student holds at most one open loan of a book, even under concurrent borrows.
+        Index(
+            "ux_borrow_records_open_loan",
+            "student_id",
+            "book_id",
+            unique=True,
+            sqlite_where=ACTIVE_BORROW,
+            postgresql_where=ACTIVE_BORROW,
+        ),
+        Index(
+            "ix_borrow_records_returned_at_fine",
+            "returned_at",
+            "fine_amount",
+            sqlite_where=RETURNED_BORROW,
+            postgresql_where=RETURNED_BORROW,
+        ),
+        Index(
+            "ix_borrow_records_active_borrowed_at_id",
+            "borrowed_at",
+            "id",
+            sqlite_where=ACTIVE_BORROW,
+            postgresql_where=ACTIVE_BORROW,
+        ),
+        # Covers the per-student open-loan counts and fine totals.
+        Index(
+            "ix_borrow_records_active_student_fine",
+            "student_id",
+            "accrued_fine",
+            sqlite_where=ACTIVE_BORROW,
+            postgresql_where=ACTIVE_BORROW,
+        ),
+        Index(
+            "ix_borrow_records_active_due_at",
+            "due_at",
+            sqlite_where=ACTIVE_BORROW,
+            postgresql_where=ACTIVE_BORROW,
+        ),
+        # Defaulter listings page on (borrowed_at, id) over the swept status.
+        # The trailing columns make the dashboard's overdue totals index-only.
+        Index(
+            "ix_borrow_records_overdue_borrowed_at_id",
+            "borrowed_at",
+            "id",
+            "accrued_fine",
+            "status",
+            sqlite_where=OVERDUE_BORROW,
+            postgresql_where=OVERDUE_BORROW,
+        ),
+    )
 
     id = Column(Integer, primary_key=True)
 
@@ -71,5 +139,84 @@ class BorrowRecord(Base):
 
     fine_amount = Column(Float, default=0.0, nullable=False)
 
+    # Maintained by the overdue sweep (backend/overdue.py): BORROWED, OVERDUE or
+    # RETURNED, plus the fine accrued as of `fine_assessed_on`.
+    status = Column(String, default="BORROWED", server_default="BORROWED", nullable=False)
+    accrued_fine = Column(Float, default=0.0, server_default="0", nullable=False)
+    fine_assessed_on = Column(Date, nullable=True)
+
     student = relationship("Student", back_populates="borrows")
     book = relationship("Book", back_populates="borrows")
+
+
+class BorrowHistory(Base):
+    """Returned loans moved out of `borrow_records` by the archive job (backend/archive.py).
+
+    Same columns as `BorrowRecord`, so rows copy across unchanged and keep their ids.
+    """
+
+    __tablename__ = "borrow_history"
+    __table_args__ = (
+        Index("ix_borrow_history_borrowed_at_id", "borrowed_at", "id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+
+    student_id = Column(Integer, ForeignKey("students.id"), nullable=False)
+    book_id = Column(Integer, ForeignKey("books.id"), nullable=False)
+
+    borrowed_at = Column(DateTime, nullable=False)
+    due_at = Column(DateTime, nullable=False)
+    lend_days = Column(Integer, nullable=False)
+    returned_at = Column(DateTime, nullable=True)
+
+    fine_amount = Column(Float, default=0.0, nullable=False)
+
+    status = Column(String, default="RETURNED", server_default="RETURNED", nullable=False)
+    accrued_fine = Column(Float, default=0.0, server_default="0", nullable=False)
+    fine_assessed_on = Column(Date, nullable=True)
+
+
+class LibraryStats(Base):
+    """Single-row running totals behind the dashboard, updated by every write."""
+
+    __tablename__ = "library_stats"
+
+    id = Column(Integer, primary_key=True)
+    total_sections = Column(Integer, default=0, nullable=False)
+    total_books = Column(Integer, default=0, nullable=False)
+    available_books = Column(Integer, default=0, nullable=False)
+    out_of_stock_books = Column(Integer, default=0, nullable=False)
+    total_students = Column(Integer, default=0, nullable=False)
+    active_borrows = Column(Integer, default=0, nullable=False)
+    total_fines_collected = Column(Float, default=0.0, nullable=False)
+
+
+class ResourceVersion(Base):
+    """Write counter per resource family, used to build ETags for cached reads."""
+
+    __tablename__ = "resource_versions"
+
+    name = Column(String, primary_key=True)
+    version = Column(Integer, default=0, nullable=False)
+
+
+class OverdueSweep(Base):
+    """Single-row marker of the last overdue sweep."""
+
+    __tablename__ = "overdue_sweeps"
+
+    id = Column(Integer, primary_key=True)
+    last_run_at = Column(DateTime, nullable=False)
+    # Date the accrued fines were last brought up to.
+    assessed_on = Column(Date, nullable=False)
+
+
+class SchemaVersion(Base):
+    """One row per migration applied by `python -m backend.migrations`."""
+
+    __tablename__ = "schema_version"
+
+    version = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False)
+    applied_at = Column(DateTime, default=datetime.now, nullable=False)
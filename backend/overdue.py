@@ -0,0 +1,178 @@
+import argparse
+import logging
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Support running this file directly: `python backend/overdue.py`.
+if __package__ in (None, ""):
+    sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy import Date, DateTime, Integer, cast, func, literal, or_, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from backend.cache import BORROWS, STUDENTS, bump_versions
+from backend.config import FINE_PER_DAY, OVERDUE_SWEEP_INTERVAL
+from backend.models import BorrowRecord, OverdueSweep
+
+logger = logging.getLogger(__name__)
+
+SWEEP_ROW_ID = 1
+
+
+def overdue_days_sql(db: Session, due_at: Any, reference_time: datetime) -> Any:
+    """SQL twin of `crud._overdue_days` for rows already known to be past due."""
+    reference = literal(reference_time, DateTime())
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        days = func.julianday(func.date(reference)) - func.julianday(func.date(due_at))
+    elif dialect in ("mysql", "mariadb"):
+        days = func.datediff(reference, due_at)
+    else:
+        # PostgreSQL and most other backends return whole days for date - date.
+        days = cast(reference, Date) - cast(due_at, Date)
+    return cast(days, Integer)
+
+
+def sweep_overdue(db: Session, now: Optional[datetime] = None, full: bool = False) -> Dict[str, int]:
+    """Mark newly overdue loans and bring accrued fines up to today.
+
+    Every open loan still marked BORROWED and past due is flipped, and every
+    past-due loan not yet assessed today gets its fine, so rows written outside
+    the API are caught too. Both are range scans on the active `due_at` index.
+    `full` also re-assesses every fine and settles returned rows.
+    """
+    now = now or datetime.now()
+    today = now.date()
+    active = BorrowRecord.returned_at.is_(None)
+
+    flipped = db.execute(
+        update(BorrowRecord)
+        .where(active, BorrowRecord.status == "BORROWED", BorrowRecord.due_at < now)
+        .values(status="OVERDUE")
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+    # Fines count whole calendar days past due, so only loans due before today accrue.
+    midnight = datetime.combine(today, datetime.min.time())
+    unassessed = [active, BorrowRecord.due_at < midnight]
+    if not full:
+        unassessed.append(or_(BorrowRecord.fine_assessed_on.is_(None), BorrowRecord.fine_assessed_on < today))
+    assessed = db.execute(
+        update(BorrowRecord)
+        .where(*unassessed)
+        .values(
+            accrued_fine=overdue_days_sql(db, BorrowRecord.due_at, now) * FINE_PER_DAY,
+            fine_assessed_on=today,
+        )
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+    settled = 0
+    if full:
+        settled = db.execute(
+            update(BorrowRecord)
+            .where(
+                BorrowRecord.returned_at.isnot(None),
+                or_(BorrowRecord.status != "RETURNED", BorrowRecord.accrued_fine != BorrowRecord.fine_amount),
+            )
+            .values(status="RETURNED", accrued_fine=BorrowRecord.fine_amount)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+
+    _save_marker(db, now, today)
+    if flipped or assessed or settled:
+        bump_versions(db, BORROWS, STUDENTS)
+    db.commit()
+    return {"flipped": flipped, "assessed": assessed, "settled": settled}
+
+
+def _save_marker(db: Session, now: datetime, today: Any) -> None:
+    # Records when the last sweep ran. Every worker's scheduler sweeps, so it is upserted rather than added.
+    values = {"id": SWEEP_ROW_ID, "last_run_at": now, "assessed_on": today}
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        insert = sqlite_insert if dialect == "sqlite" else postgresql_insert
+        statement = insert(OverdueSweep).values(**values)
+        db.execute(
+            statement.on_conflict_do_update(
+                index_elements=[OverdueSweep.id],
+                set_={"last_run_at": statement.excluded.last_run_at, "assessed_on": statement.excluded.assessed_on},
+            )
+        )
+        return
+    updated = db.execute(
+        update(OverdueSweep).where(OverdueSweep.id == SWEEP_ROW_ID).values(last_run_at=now, assessed_on=today)
+    ).rowcount
+    if not updated:
+        db.add(OverdueSweep(**values))
+
+
+class SweepScheduler:
+    """Daemon thread that runs the sweep every `interval` seconds."""
+
+    def __init__(self, interval: float = OVERDUE_SWEEP_INTERVAL) -> None:
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="overdue-sweep", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self) -> None:
+        from backend.database import SessionLocal
+
+        while not self._stop.wait(self.interval):
+            db = SessionLocal()
+            try:
+                sweep_overdue(db)
+            except Exception:
+                db.rollback()
+                logger.exception("Overdue sweep failed")
+            finally:
+                db.close()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Mark overdue loans and accrue fines.")
+    parser.add_argument("--full", action="store_true", help="Also re-assess every fine and settle returned rows")
+    parser.add_argument("--interval", type=float, default=0, help="Keep sweeping every N seconds")
+    args = parser.parse_args(argv)
+
+    from backend.database import SessionLocal
+
+    full = args.full
+    while True:
+        db = SessionLocal()
+        try:
+            started = time.perf_counter()
+            result = sweep_overdue(db, full=full)
+        finally:
+            db.close()
+        print(
+            f"Flipped: {result['flipped']}  Assessed: {result['assessed']}  "
+            f"Settled: {result['settled']}  ({(time.perf_counter() - started) * 1000:.1f} ms)"
+        )
+        if args.interval <= 0:
+            return
+        full = False
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
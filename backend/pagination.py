@@ -0,0 +1,46 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+
+def encode_cursor(sort_value: Any, row_id: int) -> str:
+    """Pack the last row's sort key into an opaque, URL-safe cursor."""
+    if isinstance(sort_value, datetime):
+        sort_value = {"dt": sort_value.isoformat()}
+    raw = json.dumps([sort_value, row_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def invalid_cursor() -> HTTPException:
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor")
+
+
+def _is_int(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def decode_cursor(cursor: Optional[str], sort_type: Optional[type] = None) -> Optional[Tuple[Any, int]]:
+    """Unpack a cursor produced by `encode_cursor`; `None` means first page.
+
+    The sort value must be a str, int or datetime (a `sort_type` when given)
+    and the row id an int. Anything else is rejected like a malformed cursor.
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        decoded = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(decoded, list) or len(decoded) != 2:
+            raise ValueError("cursor must hold a sort value and an id")
+        sort_value, row_id = decoded
+        if isinstance(sort_value, dict):
+            sort_value = datetime.fromisoformat(sort_value["dt"])
+    except (ValueError, TypeError, KeyError):
+        raise invalid_cursor()
+    scalar = _is_int(sort_value) or isinstance(sort_value, (str, datetime))
+    if not scalar or (sort_type is not None and not isinstance(sort_value, sort_type)) or not _is_int(row_id):
+        raise invalid_cursor()
+    return sort_value, row_id
@@ -0,0 +1,178 @@
+import asyncio
+import itertools
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import Context, ContextVar
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qsl
+
+from backend.config import PROFILE_DIR, PROFILE_INTERVAL_MS
+
+logger = logging.getLogger(__name__)
+
+# Set while a profiled request runs. Threadpool workers run the request's sync
+# code inside a copy of its context, which is how the sampler recognises them.
+_active_profile: ContextVar[Optional["StackSampler"]] = ContextVar("active_profile", default=None)
+
+_FLAG_VALUES = ("1", "true", "yes")
+_SLUG = re.compile(r"[^A-Za-z0-9]+")
+# A worker thread holds the context it is running in one of its outermost frames.
+_WORKER_DEPTH = 4
+_sequence = itertools.count(1)
+
+# The sampler needs the GIL to take a sample, so while any profile runs the
+# interpreter switches threads at least as often as it samples.
+_switch_lock = threading.Lock()
+_running = 0
+_default_switch_interval = sys.getswitchinterval()
+
+
+def _profile_started(interval: float) -> None:
+    global _running
+    with _switch_lock:
+        _running += 1
+        sys.setswitchinterval(min(sys.getswitchinterval(), interval))
+
+
+def _profile_finished() -> None:
+    global _running
+    with _switch_lock:
+        _running -= 1
+        if not _running:
+            sys.setswitchinterval(_default_switch_interval)
+
+
+def wants_profile(scope: Dict[str, Any]) -> bool:
+    """True if the request asks for a profile via `X-Profile: 1` or `?profile=1`."""
+    for name, value in scope["headers"]:
+        if name == b"x-profile":
+            return value.decode("latin-1").strip().lower() in _FLAG_VALUES
+    query = scope.get("query_string", b"")
+    if b"profile=" not in query:
+        return False
+    return dict(parse_qsl(query.decode("latin-1"))).get("profile", "").strip().lower() in _FLAG_VALUES
+
+
+class StackSampler:
+    """Wall-clock stack sampler for the request running in the current task.
+
+    A background thread wakes every `interval` seconds and records the stack of
+    the event loop (while it runs this request's task) and of every worker
+    thread running this request's sync code. Stacks are kept folded, root
+    first, ready for flamegraph.pl or speedscope.
+    """
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self.loop = asyncio.get_running_loop()
+        self.task = asyncio.current_task()
+        self.loop_thread = threading.get_ident()
+        self.stacks: Counter = Counter()
+        self.ticks = 0
+        self._labels: Dict[Any, str] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self) -> None:
+        _profile_started(self.interval)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        _profile_finished()
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self.ticks += 1
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                frames = self._unwind(frame)
+                if thread_id == self.loop_thread:
+                    if asyncio.current_task(self.loop) is not self.task:
+                        continue
+                elif not self._serves_request(frames):
+                    continue
+                self.stacks[";".join(self._label(item.f_code) for item in reversed(frames))] += 1
+
+    @staticmethod
+    def _unwind(frame: Any) -> List[Any]:
+        frames = []
+        while frame is not None:
+            frames.append(frame)
+            frame = frame.f_back
+        return frames
+
+    def _serves_request(self, frames: List[Any]) -> bool:
+        for frame in frames[-_WORKER_DEPTH:]:
+            for value in frame.f_locals.values():
+                if isinstance(value, Context) and value.get(_active_profile) is self:
+                    return True
+        return False
+
+    def _label(self, code: Any) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            path = Path(code.co_filename)
+            label = f"{code.co_qualname} ({path.parent.name}/{path.name}:{code.co_firstlineno})".replace(";", ":")
+            self._labels[code] = label
+        return label
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class ProfilingMiddleware:
+    """Pure ASGI middleware that profiles the requests asking for it.
+
+    Each profile is written to `directory` as folded stacks. The response
+    names the file in an `X-Profile-File` header. Other requests pass through
+    after one header scan.
+    """
+
+    def __init__(self, app: Any, directory: Path = PROFILE_DIR, interval_ms: float = PROFILE_INTERVAL_MS) -> None:
+        self.app = app
+        self.directory = Path(directory)
+        self.interval = interval_ms / 1000
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or not wants_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        slug = _SLUG.sub("_", scope["path"]).strip("_") or "root"
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{next(_sequence):04d}-{scope['method']}-{slug}.folded"
+
+        async def send_with_name(message) -> None:
+            if message["type"] == "http.response.start":
+                message = dict(message, headers=[*message.get("headers", []), (b"x-profile-file", name.encode())])
+            await send(message)
+
+        sampler = StackSampler(self.interval)
+        token = _active_profile.set(sampler)
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_name)
+        finally:
+            sampler.stop()
+            elapsed = time.perf_counter() - started
+            _active_profile.reset(token)
+            self.directory.mkdir(parents=True, exist_ok=True)
+            (self.directory / name).write_text(sampler.folded())
+            logger.info(
+                "Profiled %s %s: %d ticks over %.1f ms, written to %s",
+                scope["method"],
+                scope["path"],
+                sampler.ticks,
+                elapsed * 1000,
+                self.directory / name,
+            )
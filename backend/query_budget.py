@@ -0,0 +1,233 @@
+import re
+import sys
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Support running this file directly: `python backend/query_budget.py`.
+if __package__ in (None, ""):
+    sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from backend.config import MAX_BATCH_SIZE, QUERY_BUDGET_MODE, QUERY_REPEAT_THRESHOLD
+
+MODES = ("off", "warn", "raise")
+if QUERY_BUDGET_MODE not in MODES:
+    raise ValueError(f"Unknown QUERY_BUDGET_MODE {QUERY_BUDGET_MODE!r}; expected one of {', '.join(MODES)}")
+
+# Most SQL statements one request to each route may issue.
+QUERY_BUDGETS: Dict[Tuple[str, str], int] = {
+    ("GET", "/sections"): 3,
+    ("GET", "/books"): 3,
+    ("GET", "/books/search"): 3,
+    ("GET", "/students"): 3,
+    ("GET", "/students/lookup"): 5,
+    ("GET", "/borrows"): 3,
+    ("GET", "/defaulters"): 3,
+    ("GET", "/dashboard"): 5,
+    ("POST", "/borrow"): 12,
+    ("POST", "/return/{borrow_id}"): 10,
+    # Batches write twice per item (stock and loan), so their budgets scale with
+    # MAX_BATCH_SIZE. A per-item SELECT (an N+1) trips the repeated-shape check.
+    ("POST", "/borrow/batch"): 10 + 2 * MAX_BATCH_SIZE,
+    ("POST", "/return/batch"): 10 + 2 * MAX_BATCH_SIZE,
+}
+# Items sent in each replayed batch; enough for a per-item SELECT to repeat.
+CHECK_BATCH_SIZE = 2 * QUERY_REPEAT_THRESHOLD
+
+UNMATCHED_ROUTE = "unmatched"
+
+# Expanded IN lists vary in length; collapse them so they share one shape.
+_IN_LIST = re.compile(r"\(\s*(?:\?|:\w+|%\(\w+\)s|\$\d+)(?:\s*,\s*(?:\?|:\w+|%\(\w+\)s|\$\d+))+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+# Called with each finished request's tracker; `check_query_budgets` collects through it.
+observers: List[Callable[["RequestQueries"], None]] = []
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """Raised in "raise" mode at the statement that breaks a route's budget."""
+
+
+def statement_shape(statement: str) -> str:
+    return _WHITESPACE.sub(" ", _IN_LIST.sub("(?)", statement)).strip()
+
+
+class RequestQueries:
+    """SQL statements issued while serving one request."""
+
+    __slots__ = ("scope", "mode", "count", "shapes", "_budget", "_resolved")
+
+    def __init__(self, scope: Dict[str, Any], mode: str = QUERY_BUDGET_MODE) -> None:
+        self.scope = scope
+        self.mode = mode
+        self.count = 0
+        self.shapes: Dict[str, int] = {}
+        self._budget: Optional[int] = None
+        self._resolved = False
+
+    @property
+    def route(self) -> str:
+        return getattr(self.scope.get("route"), "path", UNMATCHED_ROUTE)
+
+    def budget(self) -> Optional[int]:
+        # The router sets scope["route"] before the endpoint runs, so the
+        # first statement of a matched request can resolve the budget.
+        if not self._resolved and "route" in self.scope:
+            self._budget = QUERY_BUDGETS.get((self.scope["method"], self.route))
+            self._resolved = True
+        return self._budget
+
+    def record(self, statement: str) -> None:
+        self.count += 1
+        if self.mode == "off":
+            return
+        budget = self.budget()
+        if budget is None:
+            return
+        if statement.lstrip()[:6].upper() == "SELECT":
+            shape = statement_shape(statement)
+            repeats = self.shapes[shape] = self.shapes.get(shape, 0) + 1
+            if self.mode == "raise" and repeats == QUERY_REPEAT_THRESHOLD:
+                raise QueryBudgetExceeded(
+                    f"{self.scope['method']} {self.route} repeated a SELECT {repeats} times "
+                    f"(likely N+1): {shape[:200]}"
+                )
+        if self.mode == "raise" and self.count == budget + 1:
+            raise QueryBudgetExceeded(
+                f"{self.scope['method']} {self.route} went over its budget of {budget} SQL statements"
+            )
+
+    def violations(self) -> List[Tuple[str, str]]:
+        """(kind, detail) for each way this request broke its route's budget."""
+        budget = self.budget()
+        if budget is None:
+            return []
+        found = []
+        if self.count > budget:
+            found.append(("budget", f"{self.count} statements, budget {budget}"))
+        for shape, repeats in self.shapes.items():
+            if repeats >= QUERY_REPEAT_THRESHOLD:
+                found.append(("repeat", f"{repeats} x {shape[:200]}"))
+        return found
+
+
+def check_query_budgets(rows: int = 60) -> List[Dict[str, Any]]:
+    """Replay the budgeted read routes on a scratch database, `rows` records deep.
+
+    Then borrow CHECK_BATCH_SIZE books in one batch and return them in
+    another. Returns one entry per request with its statement count, budget
+    and any violations.
+    """
+    import tempfile
+    from datetime import datetime, timedelta
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import create_engine, event, update
+    from sqlalchemy.orm import sessionmaker
+
+    from backend import crud
+    from backend.instrumentation import MetricsMiddleware, count_statement
+    from backend.main import app, get_db
+    from backend.migrations import upgrade
+    from backend.models import BorrowRecord
+    from backend.overdue import sweep_overdue
+    # The middleware's copy, even when this file runs as __main__.
+    from backend.query_budget import observers as request_observers
+    from backend.schemas import BookCreate, BorrowCreate, StudentCreate
+
+    scratch_dir = tempfile.TemporaryDirectory()
+    scratch = create_engine(f"sqlite:///{Path(scratch_dir.name, 'budget.db').as_posix()}")
+    upgrade(scratch)
+    ScratchSession = sessionmaker(autocommit=False, autoflush=False, bind=scratch)
+
+    db = ScratchSession()
+    try:
+        crud.ensure_sections(db)
+        section_id = crud.list_sections(db)[0]["id"]
+        for index in range(rows):
+            crud.create_book(
+                db,
+                BookCreate(
+                    title=f"Budget {index:03d}", author="Check", version="1", cost=1, section_id=section_id, total_copies=2
+                ),
+            )
+            crud.create_student(
+                db,
+                StudentCreate(
+                    full_name=f"Budget Student {index:03d}",
+                    matric_number=f"BUD/{index:03d}",
+                    email=f"budget{index}@example.com",
+                ),
+            )
+            crud.borrow_book(db, BorrowCreate(student_id=f"BUD/{index:03d}", book_id=index + 1))
+        # Put half the loans past due so defaulters and fines have rows.
+        db.execute(
+            update(BorrowRecord)
+            .where(BorrowRecord.id % 2 == 0)
+            .values(due_at=datetime.now() - timedelta(days=3))
+        )
+        db.commit()
+        sweep_overdue(db, full=True)
+    finally:
+        db.close()
+
+    def scratch_db():
+        session = ScratchSession()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    collected: List[Any] = []
+    observer = collected.append
+    request_observers.append(observer)
+    event.listen(scratch, "before_cursor_execute", count_statement)
+    app.dependency_overrides[get_db] = scratch_db
+    instrumented = any(middleware.cls is MetricsMiddleware for middleware in app.user_middleware)
+    client = TestClient(app if instrumented else MetricsMiddleware(app))
+
+    def replay(method: str, path: str, url: str, **kwargs: Any) -> Any:
+        collected.clear()
+        response = client.request(method, url, **kwargs)
+        tracker = collected[-1]
+        results.append(
+            {
+                "route": f"{method} {path}",
+                "status": response.status_code,
+                "statements": tracker.count,
+                "budget": tracker.budget(),
+                "violations": tracker.violations(),
+            }
+        )
+        return response
+
+    results: List[Dict[str, Any]] = []
+    try:
+        searches = {"/books/search": "/books/search?q=budget", "/students/lookup": "/students/lookup?prefix=bud"}
+        for method, path in QUERY_BUDGETS:
+            if method == "GET":
+                url = searches.get(path, path)
+                replay(method, path, url, params={"limit": rows} if "?" not in url else None)
+
+        # Student 0 already holds book 1, so the batch takes the books after it.
+        items = [{"student_id": "BUD/000", "book_id": book_id} for book_id in range(2, CHECK_BATCH_SIZE + 2)]
+        borrowed = replay("POST", "/borrow/batch", "/borrow/batch", json={"items": items})
+        borrow_ids = [result["borrow"]["id"] for result in borrowed.json().get("results", []) if result["ok"]]
+        replay("POST", "/return/batch", "/return/batch", json={"borrow_ids": borrow_ids})
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+        request_observers.remove(observer)
+        scratch.dispose()
+        scratch_dir.cleanup()
+    return results
+
+
+if __name__ == "__main__":
+    failures = 0
+    for result in check_query_budgets():
+        problems = result["violations"] or ([] if result["status"] < 400 else [("status", str(result["status"]))])
+        failures += bool(problems)
+        flag = "OVER" if problems else "ok"
+        print(f"[{flag}] {result['route']}: {result['statements']}/{result['budget']} statements")
+        for kind, detail in problems:
+            print(f"    {kind}: {detail}")
+    sys.exit(1 if failures else 0)
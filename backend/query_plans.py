@@ -0,0 +1,96 @@
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+# Support running this file directly: `python backend/query_plans.py`.
+if __package__ in (None, ""):
+    sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from backend import crud
+from backend.migrations import upgrade
+from backend.schemas import BookCreate, BorrowCreate, StudentCreate
+
+HOT_TABLES = ("books", "students", "borrow_records", "borrow_history")
+
+
+def _is_full_scan(plan: List[str]) -> bool:
+    for detail in plan:
+        words = detail.split()
+        if len(words) >= 2 and words[0] == "SCAN" and words[1] in HOT_TABLES and "INDEX" not in detail:
+            return True
+    # Any sort the indexes cannot supply, including one inside a subquery.
+    return any(detail.startswith("USE TEMP B-TREE FOR ORDER BY") for detail in plan)
+
+
+def check_query_plans() -> List[Dict[str, Any]]:
+    """Run the hot crud paths on a scratch SQLite database and EXPLAIN every SELECT.
+
+    Returns one entry per distinct statement with its plan and whether it
+    falls back to a full table scan or an unindexed sort.
+    """
+    scratch = create_engine("sqlite://")
+    upgrade(scratch)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=scratch)()
+
+    captured: Dict[str, Any] = {}
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and statement not in captured:
+            captured[statement] = parameters
+
+    try:
+        crud.ensure_sections(db)
+        section_id = crud.list_sections(db)[0]["id"]
+        book = crud.create_book(
+            db,
+            BookCreate(title="Plan", author="Check", version="1", cost=1, section_id=section_id, total_copies=2),
+        )
+        crud.create_student(
+            db,
+            StudentCreate(full_name="Plan Check", matric_number="PLAN/001", email="plan@example.com"),
+        )
+
+        event.listen(scratch, "before_cursor_execute", capture)
+        borrow = crud.borrow_book(db, BorrowCreate(student_id="PLAN/001", book_id=book["id"]))
+        crud.return_book(db, borrow["id"])
+        crud.list_books(db)
+        crud.list_books(db, section_id=section_id, include_out_of_stock=False)
+        crud.list_students(db)
+        crud.lookup_students(db, "pla")
+        crud.list_borrows(db)
+        crud.list_borrows(db, only_active=True)
+        crud.list_borrows(db, include_history=True)
+        crud.list_defaulters(db)
+        crud.dashboard_summary(db)
+        event.remove(scratch, "before_cursor_execute", capture)
+
+        results = []
+        with scratch.connect() as conn:
+            for statement, parameters in captured.items():
+                rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+                plan = [row[-1] for row in rows]
+                results.append(
+                    {
+                        "statement": statement,
+                        "plan": plan,
+                        "full_scan": _is_full_scan(plan),
+                    }
+                )
+        return results
+    finally:
+        db.close()
+        scratch.dispose()
+
+
+if __name__ == "__main__":
+    failures = 0
+    for result in check_query_plans():
+        flag = "FULL SCAN" if result["full_scan"] else "ok"
+        failures += result["full_scan"]
+        print(f"[{flag}] {' '.join(result['statement'].split())[:160]}")
+        for detail in result["plan"]:
+            print(f"    {detail}")
+    sys.exit(1 if failures else 0)
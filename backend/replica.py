@@ -0,0 +1,92 @@
+import argparse
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+# Support running this file directly: `python backend/replica.py`.
+if __package__ in (None, ""):
+    sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from fastapi import Request, Response
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+from backend.config import DATABASE_REPLICA_URL, DATABASE_URL, READ_YOUR_WRITES_SECONDS
+
+READ_METHODS = ("GET", "HEAD")
+# Set on responses to writes; while present the client's reads stay on the primary.
+LAST_WRITE_COOKIE = "lms_recent_write"
+
+
+def prefers_replica(request: Request) -> bool:
+    return request.method in READ_METHODS and LAST_WRITE_COOKIE not in request.cookies
+
+
+def route_session(db: Session, request: Request, response: Response) -> None:
+    """Send this request's reads to the replica unless the client just wrote."""
+    if not DATABASE_REPLICA_URL:
+        return
+    if request.method in READ_METHODS:
+        db.info["read_only"] = prefers_replica(request)
+    else:
+        response.set_cookie(
+            LAST_WRITE_COOKIE,
+            "1",
+            max_age=READ_YOUR_WRITES_SECONDS,
+            httponly=True,
+            samesite="lax",
+        )
+
+
+def _sqlite_path(url: str) -> Optional[Path]:
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "sqlite" or parsed.database in (None, "", ":memory:"):
+        return None
+    return Path(parsed.database)
+
+
+def sync_replica(primary_url: str = DATABASE_URL, replica_url: Optional[str] = DATABASE_REPLICA_URL) -> bool:
+    """Copy a SQLite primary onto a SQLite replica file with the online backup API.
+
+    The copy is taken in one step so readers of the replica never see a
+    half-applied snapshot. Returns False when either side is not a SQLite file;
+    other backends replicate on their own.
+    """
+    if not replica_url:
+        return False
+    source_path = _sqlite_path(primary_url)
+    target_path = _sqlite_path(replica_url)
+    if source_path is None or target_path is None:
+        return False
+
+    source = sqlite3.connect(source_path)
+    target = sqlite3.connect(target_path, timeout=30)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+    return True
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Refresh the SQLite read replica from the primary database.")
+    parser.add_argument("--interval", type=float, default=0, help="Keep syncing every N seconds")
+    args = parser.parse_args(argv)
+
+    if not DATABASE_REPLICA_URL:
+        parser.error("DATABASE_REPLICA_URL is not set")
+    while True:
+        started = time.perf_counter()
+        if not sync_replica():
+            parser.error("Both DATABASE_URL and DATABASE_REPLICA_URL must be SQLite files")
+        print(f"Replica synced in {(time.perf_counter() - started) * 1000:.1f} ms")
+        if args.interval <= 0:
+            return
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""Schema version 1, frozen as it shipped.
+
+Migration 1 builds exactly these tables, so it means the same thing on every
+database no matter how the models change later. Do not edit this file; ship
+schema changes as new steps in backend/migrations.py.
+"""
+from sqlalchemy import (
+    Column,
+    Date,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    UniqueConstraint,
+    text,
+)
+
+metadata = MetaData()
+
+ACTIVE_BORROW = text("returned_at IS NULL")
+RETURNED_BORROW = text("returned_at IS NOT NULL")
+OVERDUE_BORROW = text("status = 'OVERDUE'")
+
+Table(
+    "sections",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("name", String, unique=True, nullable=False),
+)
+
+Table(
+    "books",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("title", String, nullable=False),
+    Column("author", String, nullable=False),
+    Column("version", String, nullable=False),
+    Column("cost", Float, nullable=False),
+    Column("total_copies", Integer, nullable=False),
+    Column("available_copies", Integer, nullable=False),
+    Column("status", String),
+    Column("section_id", Integer, ForeignKey("sections.id"), nullable=False),
+    UniqueConstraint("title", "author", "version", "section_id", name="uq_book_identity"),
+    Index("ix_books_title_id", "title", "id"),
+    Index("ix_books_section_title_id", "section_id", "title", "id"),
+    Index("ix_books_available_copies", "available_copies"),
+)
+
+Table(
+    "students",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("full_name", String, nullable=False),
+    Column("matric_number", String, unique=True, nullable=False),
+    Column("email", String, unique=True, nullable=False),
+    Column("department", String, nullable=True),
+    Column("created_at", DateTime, nullable=False),
+    Index("ix_students_full_name_id", "full_name", "id"),
+)
+
+Table(
+    "borrow_records",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("student_id", Integer, ForeignKey("students.id"), nullable=False),
+    Column("book_id", Integer, ForeignKey("books.id"), nullable=False),
+    Column("borrowed_at", DateTime, nullable=False),
+    Column("due_at", DateTime, nullable=False),
+    Column("lend_days", Integer, nullable=False),
+    Column("returned_at", DateTime, nullable=True),
+    Column("fine_amount", Float, nullable=False),
+    Column("status", String, server_default="BORROWED", nullable=False),
+    Column("accrued_fine", Float, server_default="0", nullable=False),
+    Column("fine_assessed_on", Date, nullable=True),
+    Index("ix_borrow_records_borrowed_at_id", "borrowed_at", "id"),
+    Index("ix_borrow_records_student_book_returned", "student_id", "book_id", "returned_at"),
+    Index(
+        "ix_borrow_records_returned_at_fine",
+        "returned_at",
+        "fine_amount",
+        sqlite_where=RETURNED_BORROW,
+        postgresql_where=RETURNED_BORROW,
+    ),
+    Index(
+        "ix_borrow_records_active_borrowed_at_id",
+        "borrowed_at",
+        "id",
+        sqlite_where=ACTIVE_BORROW,
+        postgresql_where=ACTIVE_BORROW,
+    ),
+    Index(
+        "ix_borrow_records_active_student_fine",
+        "student_id",
+        "accrued_fine",
+        sqlite_where=ACTIVE_BORROW,
+        postgresql_where=ACTIVE_BORROW,
+    ),
+    Index(
+        "ix_borrow_records_active_due_at",
+        "due_at",
+        sqlite_where=ACTIVE_BORROW,
+        postgresql_where=ACTIVE_BORROW,
+    ),
+    Index(
+        "ix_borrow_records_overdue_borrowed_at_id",
+        "borrowed_at",
+        "id",
+        "accrued_fine",
+        "status",
+        sqlite_where=OVERDUE_BORROW,
+        postgresql_where=OVERDUE_BORROW,
+    ),
+)
+
+Table(
+    "borrow_history",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("student_id", Integer, ForeignKey("students.id"), nullable=False),
+    Column("book_id", Integer, ForeignKey("books.id"), nullable=False),
+    Column("borrowed_at", DateTime, nullable=False),
+    Column("due_at", DateTime, nullable=False),
+    Column("lend_days", Integer, nullable=False),
+    Column("returned_at", DateTime, nullable=True),
+    Column("fine_amount", Float, nullable=False),
+    Column("status", String, server_default="RETURNED", nullable=False),
+    Column("accrued_fine", Float, server_default="0", nullable=False),
+    Column("fine_assessed_on", Date, nullable=True),
+    Index("ix_borrow_history_borrowed_at_id", "borrowed_at", "id"),
+)
+
+Table(
+    "library_stats",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("total_sections", Integer, nullable=False),
+    Column("total_books", Integer, nullable=False),
+    Column("available_books", Integer, nullable=False),
+    Column("out_of_stock_books", Integer, nullable=False),
+    Column("total_students", Integer, nullable=False),
+    Column("active_borrows", Integer, nullable=False),
+    Column("total_fines_collected", Float, nullable=False),
+)
+
+Table(
+    "resource_versions",
+    metadata,
+    Column("name", String, primary_key=True),
+    Column("version", Integer, nullable=False),
+)
+
+Table(
+    "overdue_sweeps",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("last_run_at", DateTime, nullable=False),
+    Column("assessed_on", Date, nullable=False),
+)
+
+# The SQLite FTS5 catalogue index and the triggers that keep it in step with books.
+FTS_DDL = [
+    """
+    CREATE VIRTUAL TABLE books_fts USING fts5(
+        title, author, version,
+        content='books', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER books_fts_ai AFTER INSERT ON books BEGIN
+        INSERT INTO books_fts(rowid, title, author, version)
+        VALUES (new.id, new.title, new.author, new.version);
+    END
+    """,
+    """
+    CREATE TRIGGER books_fts_ad AFTER DELETE ON books BEGIN
+        INSERT INTO books_fts(books_fts, rowid, title, author, version)
+        VALUES ('delete', old.id, old.title, old.author, old.version);
+    END
+    """,
+    """
+    CREATE TRIGGER books_fts_au AFTER UPDATE OF title, author, version ON books BEGIN
+        INSERT INTO books_fts(books_fts, rowid, title, author, version)
+        VALUES ('delete', old.id, old.title, old.author, old.version);
+        INSERT INTO books_fts(rowid, title, author, version)
+        VALUES (new.id, new.title, new.author, new.version);
+    END
+    """,
+    "INSERT INTO books_fts(books_fts) VALUES ('rebuild')",
+]
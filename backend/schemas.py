@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 from pydantic import BaseModel, Field
 
@@ -8,6 +8,7 @@ class SectionOut(BaseModel):
     id: int
     name: str
     book_count: int = 0
+    available_count: int = 0
 
 
 class BookCreate(BaseModel):
@@ -32,6 +33,11 @@ class BookOut(BaseModel):
     section_name: str
 
 
+class BookPage(BaseModel):
+    items: List[BookOut]
+    next_cursor: Optional[str] = None
+
+
 class StockUpdate(BaseModel):
     added_copies: int = Field(..., ge=1)
 
@@ -54,6 +60,18 @@ class StudentOut(BaseModel):
     outstanding_fine: float
 
 
+class StudentLookupOut(BaseModel):
+    id: str
+    full_name: str
+    matric_number: str
+    email: str
+
+
+class StudentPage(BaseModel):
+    items: List[StudentOut]
+    next_cursor: Optional[str] = None
+
+
 class BorrowCreate(BaseModel):
     student_id: str = Field(..., min_length=3, max_length=50)
     book_id: int = Field(..., gt=0)
@@ -77,6 +95,45 @@ class BorrowOut(BaseModel):
     status: str
 
 
+class BorrowPage(BaseModel):
+    items: List[BorrowOut]
+    next_cursor: Optional[str] = None
+
+
+class BorrowBatchCreate(BaseModel):
+    items: List[BorrowCreate]
+
+
+class ReturnBatchCreate(BaseModel):
+    borrow_ids: List[int]
+
+
+class BatchItemResult(BaseModel):
+    index: int
+    ok: bool
+    status_code: int
+    detail: Optional[str] = None
+    borrow: Optional[BorrowOut] = None
+
+
+class BatchResult(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[BatchItemResult]
+
+
+class ImportRowError(BaseModel):
+    row: int
+    detail: str
+
+
+class ImportReport(BaseModel):
+    inserted: int
+    updated: int
+    failed: int
+    errors: List[ImportRowError]
+
+
 class DashboardOut(BaseModel):
     total_sections: int
     total_books: int
@@ -0,0 +1,45 @@
+import re
+from typing import List
+
+from sqlalchemy import Float, Integer, text
+from sqlalchemy.orm import Session
+
+# External-content FTS5 index over the catalogue text columns, created by the
+# baseline migration (backend/schema_v1.py). Triggers keep it in step with books.
+FTS_TABLE = "books_fts"
+
+# bm25 column weights: title matches outrank author, which outrank version.
+FTS_RANKED_MATCHES = text(
+    f"SELECT rowid AS book_id, bm25({FTS_TABLE}, 10.0, 5.0, 1.0) AS score "
+    f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match"
+).columns(book_id=Integer, score=Float)
+
+
+# Engines whose database is known to have the index; it is never dropped at runtime.
+_READY = set()
+
+
+def _fts_exists(conn) -> bool:
+    row = conn.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+        (FTS_TABLE,),
+    ).first()
+    return row is not None
+
+
+def fts_available(db: Session) -> bool:
+    bind = db.get_bind()
+    if bind.dialect.name != "sqlite":
+        return False
+    if str(bind.url) not in _READY and _fts_exists(db.connection()):
+        _READY.add(str(bind.url))
+    return str(bind.url) in _READY
+
+
+def search_terms(query: str) -> List[str]:
+    return re.findall(r"\w+", query, flags=re.UNICODE)
+
+
+def match_expression(terms: List[str]) -> str:
+    # Every term must match, each as a prefix; quoting neutralises FTS syntax.
+    return " ".join(f'"{term}"*' for term in terms)
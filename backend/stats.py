@@ -0,0 +1,95 @@
+import sys
+from pathlib import Path
+from typing import Dict, Union
+
+# Support running this file directly: `python backend/stats.py`.
+if __package__ in (None, ""):
+    sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+
+from backend.models import Book, BorrowHistory, BorrowRecord, LibraryStats, Section, Student
+
+STATS_ROW_ID = 1
+
+
+def rebuild_stats(db: Session) -> LibraryStats:
+    """Recount every dashboard counter from the base tables (no commit)."""
+    # Pending inserts must be visible to the recount.
+    db.flush()
+    totals = {
+        "total_sections": db.query(func.count(Section.id)).scalar() or 0,
+        "total_books": db.query(func.count(Book.id)).scalar() or 0,
+        "available_books": db.query(func.coalesce(func.sum(Book.available_copies), 0)).scalar() or 0,
+        "out_of_stock_books": db.query(func.count(Book.id)).filter(Book.available_copies <= 0).scalar() or 0,
+        "total_students": db.query(func.count(Student.id)).scalar() or 0,
+        "active_borrows": (
+            db.query(func.count(BorrowRecord.id)).filter(BorrowRecord.returned_at.is_(None)).scalar() or 0
+        ),
+        # Archived loans were returned too, so their fines still count.
+        "total_fines_collected": (
+            (
+                db.query(func.coalesce(func.sum(BorrowRecord.fine_amount), 0.0))
+                .filter(BorrowRecord.returned_at.isnot(None))
+                .scalar()
+                or 0.0
+            )
+            + (db.query(func.coalesce(func.sum(BorrowHistory.fine_amount), 0.0)).scalar() or 0.0)
+        ),
+    }
+
+    stats = db.get(LibraryStats, STATS_ROW_ID)
+    if stats is None:
+        stats = LibraryStats(id=STATS_ROW_ID)
+        db.add(stats)
+    for name, value in totals.items():
+        setattr(stats, name, value)
+    db.flush()
+    return stats
+
+
+def bump_stats(db: Session, **deltas: Union[int, float]) -> None:
+    """Apply counter deltas in the caller's transaction."""
+    deltas = {name: value for name, value in deltas.items() if value}
+    if not deltas:
+        return
+
+    values = {name: getattr(LibraryStats, name) + value for name, value in deltas.items()}
+    result = db.execute(update(LibraryStats).where(LibraryStats.id == STATS_ROW_ID).values(values))
+    if result.rowcount == 0:
+        # First write on a database without a stats row: the recount already
+        # includes this transaction's changes, so the deltas are not reapplied.
+        rebuild_stats(db)
+
+
+def read_stats(db: Session) -> LibraryStats:
+    stats = db.get(LibraryStats, STATS_ROW_ID)
+    if stats is None:
+        stats = rebuild_stats(db)
+        db.commit()
+    return stats
+
+
+def reconcile_stats(db: Session) -> Dict[str, Union[int, float]]:
+    """Rebuild the counters from scratch and report the corrected values."""
+    stats = rebuild_stats(db)
+    db.commit()
+    return {
+        column.name: getattr(stats, column.name)
+        for column in LibraryStats.__table__.columns
+        if column.name != "id"
+    }
+
+
+if __name__ == "__main__":
+    from backend.database import SessionLocal, engine
+    from backend.migrations import check_schema
+
+    check_schema(engine)
+    session = SessionLocal()
+    try:
+        for name, value in reconcile_stats(session).items():
+            print(f"{name}: {value}")
+    finally:
+        session.close()
@@ -0,0 +1 @@
+# Benchmark scripts package marker for `python -m benchmarks.<name>`.
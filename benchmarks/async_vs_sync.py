@@ -0,0 +1,129 @@
+"""Compare concurrent-request throughput of the sync and async route stacks.
+
+Both apps are driven in-process through httpx's ASGI transport against the
+same scratch SQLite database, so the numbers isolate the request-handling
+model (threadpool vs event loop) from network effects. The threadpool is
+sized to THREADPOOL_SIZE as in the server's startup hook, since the ASGI
+transport does not run lifespan events. Requires httpx and aiosqlite.
+
+    python -m benchmarks.async_vs_sync --requests 2000 --concurrency 32
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+READ_PATHS = ["/dashboard", "/books", "/students", "/borrows?only_active=true", "/sections"]
+
+
+def _seed(books: int, students: int) -> None:
+    from backend import crud
+    from backend.database import SessionLocal
+    from backend.init__db import initialize_database
+    from backend.schemas import BookCreate, BorrowCreate, StudentCreate
+
+    initialize_database()
+    db = SessionLocal()
+    try:
+        section_ids = [section["id"] for section in crud.list_sections(db)]
+        for index in range(books):
+            crud.create_book(
+                db,
+                BookCreate(
+                    title=f"Title {index:05d}",
+                    author=f"Author {index % 97}",
+                    version="1st",
+                    cost=1000,
+                    section_id=section_ids[index % len(section_ids)],
+                    total_copies=5,
+                ),
+            )
+        for index in range(students):
+            crud.create_student(
+                db,
+                StudentCreate(
+                    full_name=f"Student {index:05d}",
+                    matric_number=f"BEN/{index:05d}",
+                    email=f"student{index}@bench.local",
+                ),
+            )
+            crud.borrow_book(db, BorrowCreate(student_id=f"BEN/{index:05d}", book_id=1 + index % books))
+    finally:
+        db.close()
+
+
+async def _drive(app, total: int, concurrency: int) -> dict:
+    import httpx
+
+    from backend.main import size_threadpool
+
+    await size_threadpool()
+
+    latencies = []
+    queue = asyncio.Queue()
+    for index in range(total):
+        queue.put_nowait(READ_PATHS[index % len(READ_PATHS)])
+
+    async def worker(client):
+        while True:
+            try:
+                path = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            started = time.perf_counter()
+            response = await client.get(path)
+            latencies.append(time.perf_counter() - started)
+            response.raise_for_status()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests_per_second": total / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--books", type=int, default=500)
+    parser.add_argument("--students", type=int, default=300)
+    args = parser.parse_args()
+
+    scratch = Path(tempfile.mkdtemp()) / "bench.db"
+    os.environ["DATABASE_URL"] = f"sqlite:///{scratch.as_posix()}"
+    os.environ.pop("ASYNC_DATABASE_URL", None)
+    os.environ["ASYNC_DATABASE"] = "0"
+    _seed(args.books, args.students)
+
+    from fastapi import FastAPI
+
+    from backend.async_routes import router as async_router
+    from backend.main import app as sync_app
+
+    async_app = FastAPI()
+    async_app.include_router(async_router)
+
+    for name, app in (("sync", sync_app), ("async", async_app)):
+        result = asyncio.run(_drive(app, args.requests, args.concurrency))
+        print(
+            f"{name:>5}: {result['requests_per_second']:8.1f} req/s  "
+            f"p50 {result['p50_ms']:7.2f} ms  p95 {result['p95_ms']:7.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""Time each crud function and compare against a saved baseline.
+
+Every case runs on a fresh session, like a request would. For each case the
+suite reports the median and best wall time, the number of SQL statements
+issued, and the peak Python memory allocated (tracemalloc, measured in a
+separate run so it does not skew the timings). With --baseline, the exit
+status is 1 when a case got slower than the tolerance allows, issues more
+queries, or allocates noticeably more.
+
+    python -m benchmarks.generate_data --database /tmp/library.db --books 20000 --students 10000 --borrows 200000
+    python -m benchmarks.bench_crud --database /tmp/library.db --save-baseline /tmp/crud-baseline.json
+    python -m benchmarks.bench_crud --database /tmp/library.db --baseline /tmp/crud-baseline.json
+
+The write cases (borrow_book, return_book) add a bench student, a bench book
+and one returned loan per round to the database they run against. Without
+--database a scratch database is generated first.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+BENCH_MATRIC = "BENCH/000001"
+# A case fails the baseline check only if it is slower by both margins.
+MIN_REGRESSION_MS = 1.0
+
+
+def _cases(db) -> Dict[str, Callable[[Any], Any]]:
+    from backend import crud
+    from backend.models import Book, BorrowRecord, Section, Student
+    from backend.schemas import BookCreate, BorrowCreate, StudentCreate
+
+    section_id = db.query(Section.id).order_by(Section.id).limit(1).scalar()
+    second_books = crud.list_books(db)["next_cursor"]
+    second_borrows = crud.list_borrows(db)["next_cursor"]
+    # A whole title, as someone looking for one book would type it.
+    title = db.query(Book.title).order_by(Book.id).limit(1).scalar() or "a"
+    name_prefix = (db.query(Student.full_name).order_by(Student.id).limit(1).scalar() or "a")[:4]
+
+    if db.query(Student.id).filter(Student.matric_number == BENCH_MATRIC).first() is None:
+        crud.create_student(
+            db, StudentCreate(full_name="Bench Student", matric_number=BENCH_MATRIC, email="bench@example.com")
+        )
+    bench_book = db.query(Book.id).filter(Book.title == "Bench Book").scalar()
+    if bench_book is None:
+        bench_book = crud.create_book(
+            db,
+            BookCreate(title="Bench Book", author="Bench", version="1", cost=100, section_id=section_id, total_copies=1),
+        )["id"]
+
+    # Close loans left open by an interrupted run, or the first borrow would fail.
+    stale = db.query(BorrowRecord.id).filter(BorrowRecord.book_id == bench_book, BorrowRecord.returned_at.is_(None))
+    for (borrow_id,) in stale.all():
+        crud.return_book(db, borrow_id)
+
+    open_loans: List[int] = []
+
+    def borrow(session):
+        open_loans.append(crud.borrow_book(session, BorrowCreate(student_id=BENCH_MATRIC, book_id=bench_book))["id"])
+
+    def give_back(session):
+        crud.return_book(session, open_loans.pop())
+
+    # Cases run in this order every round, so each borrow is returned before the next.
+    return {
+        "list_sections": crud.list_sections,
+        "list_books": crud.list_books,
+        "list_books_page_2": lambda session: crud.list_books(session, after=second_books),
+        "list_books_section_in_stock": lambda session: crud.list_books(
+            session, section_id=section_id, include_out_of_stock=False
+        ),
+        "search_books": lambda session: crud.search_books(session, title),
+        "list_students": crud.list_students,
+        "lookup_students": lambda session: crud.lookup_students(session, name_prefix),
+        "list_borrows": crud.list_borrows,
+        "list_borrows_page_2": lambda session: crud.list_borrows(session, after=second_borrows),
+        "list_borrows_active": lambda session: crud.list_borrows(session, only_active=True),
+        "list_borrows_with_history": lambda session: crud.list_borrows(session, include_history=True),
+        "list_defaulters": crud.list_defaulters,
+        "dashboard_summary": crud.dashboard_summary,
+        "borrow_book": borrow,
+        "return_book": give_back,
+    }
+
+
+def run(repeat: int) -> Dict[str, Dict[str, float]]:
+    from sqlalchemy import event
+
+    from backend.database import SessionLocal, engine
+    from backend.overdue import sweep_overdue
+
+    setup = SessionLocal()
+    try:
+        sweep_overdue(setup)
+        cases = _cases(setup)
+    finally:
+        setup.close()
+
+    statements = [0]
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements[0] += 1
+
+    def call(fn: Callable[[Any], Any]) -> int:
+        db = SessionLocal()
+        before = statements[0]
+        try:
+            fn(db)
+        finally:
+            db.close()
+        return statements[0] - before
+
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        timings: Dict[str, List[float]] = {name: [] for name in cases}
+        queries: Dict[str, int] = {}
+        # The first round warms caches and connections and is not recorded.
+        for round_number in range(repeat + 1):
+            for name, fn in cases.items():
+                started = time.perf_counter()
+                issued = call(fn)
+                elapsed = time.perf_counter() - started
+                if round_number:
+                    timings[name].append(elapsed * 1000)
+                    queries[name] = issued
+
+        peaks: Dict[str, float] = {}
+        for name, fn in cases.items():
+            tracemalloc.start()
+            try:
+                call(fn)
+                peaks[name] = tracemalloc.get_traced_memory()[1] / 1024
+            finally:
+                tracemalloc.stop()
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+
+    return {
+        name: {
+            "median_ms": statistics.median(timings[name]),
+            "min_ms": min(timings[name]),
+            "queries": queries[name],
+            "peak_kib": peaks[name],
+        }
+        for name in cases
+    }
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], tolerance: float) -> List[str]:
+    """Describe every case that regressed against `baseline`."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        slower = result["median_ms"] - base["median_ms"]
+        if result["median_ms"] > base["median_ms"] * (1 + tolerance) and slower > MIN_REGRESSION_MS:
+            regressions.append(f"{name}: {base['median_ms']:.2f} -> {result['median_ms']:.2f} ms")
+        if result["queries"] > base["queries"]:
+            regressions.append(f"{name}: {base['queries']} -> {result['queries']} queries")
+        if result["peak_kib"] > base["peak_kib"] * (1 + tolerance) and result["peak_kib"] - base["peak_kib"] > 64:
+            regressions.append(f"{name}: {base['peak_kib']:.0f} -> {result['peak_kib']:.0f} KiB peak")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database", help="SQLite file or database URL to run against")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed rounds per case")
+    parser.add_argument("--baseline", type=Path, help="Compare against this saved baseline")
+    parser.add_argument("--save-baseline", type=Path, help="Write the results to this file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown before failing")
+    parser.add_argument("--books", type=int, default=10_000, help="Scratch database size without --database")
+    parser.add_argument("--students", type=int, default=5_000)
+    parser.add_argument("--borrows", type=int, default=100_000)
+    args = parser.parse_args()
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+
+    if args.database:
+        url = args.database if "://" in args.database else f"sqlite:///{Path(args.database).resolve().as_posix()}"
+        os.environ["DATABASE_URL"] = url
+    else:
+        scratch = Path(tempfile.mkdtemp()) / "bench.db"
+        os.environ["DATABASE_URL"] = f"sqlite:///{scratch.as_posix()}"
+        from benchmarks.generate_data import generate
+
+        print(f"Generating {args.borrows} loans into {scratch} ...")
+        generate(books=args.books, students=args.students, borrows=args.borrows)
+
+    results = run(args.repeat)
+
+    baseline = None
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())["results"]
+
+    print(f"{'case':<30}{'median ms':>11}{'min ms':>9}{'queries':>9}{'peak KiB':>10}  vs baseline")
+    for name, result in results.items():
+        change = ""
+        if baseline and name in baseline and baseline[name]["median_ms"]:
+            change = f"{(result['median_ms'] / baseline[name]['median_ms'] - 1) * 100:+.0f}%"
+        print(
+            f"{name:<30}{result['median_ms']:>11.2f}{result['min_ms']:>9.2f}"
+            f"{result['queries']:>9}{result['peak_kib']:>10.0f}  {change}"
+        )
+
+    if args.save_baseline:
+        args.save_baseline.write_text(
+            json.dumps(
+                {
+                    "python": platform.python_version(),
+                    "database": os.environ["DATABASE_URL"],
+                    "repeat": args.repeat,
+                    "results": results,
+                },
+                indent=2,
+            )
+            + "\n"
+        )
+        print(f"Baseline written to {args.save_baseline}")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("Regressions:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+        print("No regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""Fill an empty database with deterministic synthetic library data.
+
+The same seed and --as-of date always produce the same rows. Loans are laid
+out relative to --as-of (default: today). Open loans are split between on
+time and overdue, and returned loans include late returns with fines. After
+loading, the overdue sweep and dashboard counters are rebuilt so the API
+serves the data as if it had been recorded through it.
+
+    python -m benchmarks.generate_data --database /tmp/library-1m.db \\
+        --books 100000 --students 50000 --borrows 1000000
+"""
+import argparse
+import heapq
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+from operator import itemgetter
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+DEPARTMENTS = ["Physics", "History", "Economics", "Law", "Medicine", "Engineering", "Theology", None]
+LEND_DAYS = [7, 7, 7, 14, 14, 21, 30]
+LOAN_FIELDS = ("borrowed_at", "student_id", "book_id", "due_at", "lend_days", "returned_at", "fine_amount")
+CHUNK_SIZE = 10_000
+RETURNED_MIN_AGE_DAYS = max(LEND_DAYS) + 31
+
+
+def _chunks(rows: Iterator[Dict], size: int = CHUNK_SIZE) -> Iterator[List[Dict]]:
+    chunk: List[Dict] = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _late_days(due_at: datetime, returned_at: datetime) -> int:
+    return max(0, (returned_at.date() - due_at.date()).days)
+
+
+def generate(
+    sections: int = 6,
+    books: int = 100_000,
+    students: int = 50_000,
+    borrows: int = 1_000_000,
+    returned_ratio: float = 0.85,
+    overdue_ratio: float = 0.3,
+    late_ratio: float = 0.15,
+    history_days: int = 730,
+    seed: int = 7,
+    as_of: Optional[date] = None,
+) -> Dict[str, int]:
+    """Load synthetic rows into the database named by DATABASE_URL.
+
+    The target must not hold books, students or loans yet. Returns the
+    number of rows written per table.
+    """
+    from sqlalchemy import func, insert
+
+    from backend.cache import ALL_FAMILIES, bump_versions
+    from backend.config import FINE_PER_DAY, LIBRARY_SECTIONS
+    from backend.database import SessionLocal, engine
+    from backend.init__db import initialize_database
+    from backend.models import Book, BorrowRecord, Section, Student
+    from backend.overdue import sweep_overdue
+    from backend.stats import reconcile_stats
+
+    rnd = random.Random(seed)
+    midnight = datetime.combine(as_of or date.today(), datetime.min.time())
+    initialize_database()
+
+    db = SessionLocal()
+    try:
+        for model in (Book, Student, BorrowRecord):
+            if db.query(func.count(model.id)).scalar():
+                raise ValueError(f"{model.__tablename__} is not empty; point --database at a new file")
+
+        extra_sections = [
+            {"name": f"SECTION {index:02d}"} for index in range(len(LIBRARY_SECTIONS) + 1, sections + 1)
+        ]
+        if extra_sections:
+            db.execute(insert(Section), extra_sections)
+        section_ids = [section_id for (section_id,) in db.query(Section.id).order_by(Section.id)]
+
+        total_copies = [rnd.randint(1, 10) for _ in range(books)]
+        available = list(total_copies)
+        returned = sum(rnd.random() < returned_ratio for _ in range(borrows))
+
+        # Open loans are few enough to build in memory. Each needs a free copy
+        # and no other open loan of the same book by the same student.
+        open_loans: List[Tuple] = []
+        open_pairs = set()
+        for _ in range(borrows - returned):
+            lend_days = rnd.choice(LEND_DAYS)
+            student_id = rnd.randint(1, students)
+            for _attempt in range(20):
+                book_id = rnd.randint(1, books)
+                if available[book_id - 1] and (student_id, book_id) not in open_pairs:
+                    break
+            else:
+                continue
+            available[book_id - 1] -= 1
+            open_pairs.add((student_id, book_id))
+            if rnd.random() < overdue_ratio:
+                due_at = midnight - timedelta(days=rnd.randint(1, 60), seconds=rnd.randint(0, 86_399))
+                borrowed_at = due_at - timedelta(days=lend_days)
+            else:
+                borrowed_at = midnight - timedelta(seconds=rnd.randint(0, (lend_days - 1) * 86_400))
+                due_at = borrowed_at + timedelta(days=lend_days)
+            open_loans.append((borrowed_at, student_id, book_id, due_at, lend_days, None, 0.0))
+        open_loans.sort(key=itemgetter(0))
+
+        # Returned loans stream out oldest first from sorted start offsets, so
+        # millions of them never sit in memory. Starting 61+ days back leaves
+        # room for the longest loan plus a late return.
+        oldest = max(history_days, RETURNED_MIN_AGE_DAYS) * 86_400
+        offsets = sorted(
+            (rnd.randint(RETURNED_MIN_AGE_DAYS * 86_400, oldest) for _ in range(returned)),
+            reverse=True,
+        )
+
+        def returned_loans() -> Iterator[Tuple]:
+            for offset in offsets:
+                lend_days = rnd.choice(LEND_DAYS)
+                borrowed_at = midnight - timedelta(seconds=offset)
+                due_at = borrowed_at + timedelta(days=lend_days)
+                if rnd.random() < late_ratio:
+                    returned_at = due_at + timedelta(days=rnd.randint(1, 30))
+                else:
+                    returned_at = borrowed_at + timedelta(seconds=rnd.randint(3_600, lend_days * 86_400))
+                fine_amount = float(_late_days(due_at, returned_at) * FINE_PER_DAY)
+                student_id = rnd.randint(1, students)
+                book_id = rnd.randint(1, books)
+                yield (borrowed_at, student_id, book_id, due_at, lend_days, returned_at, fine_amount)
+
+        book_rows = (
+            {
+                "id": index + 1,
+                "title": f"Synthetic Title {index:06d}",
+                "author": f"Author {rnd.randint(1, max(1, books // 20)):05d}",
+                "version": f"{1 + index % 4}e",
+                "cost": float(rnd.randint(5, 200) * 100),
+                "section_id": section_ids[index % len(section_ids)],
+                "total_copies": total_copies[index],
+                "available_copies": available[index],
+                "status": "AVAILABLE" if available[index] else "OUT_OF_STOCK",
+            }
+            for index in range(books)
+        )
+        student_rows = (
+            {
+                "id": index + 1,
+                "full_name": f"Student {index:06d}",
+                "matric_number": f"GEN/{index:06d}",
+                "email": f"student{index:06d}@example.com",
+                "department": DEPARTMENTS[index % len(DEPARTMENTS)],
+                "created_at": midnight - timedelta(days=history_days, seconds=index),
+            }
+            for index in range(students)
+        )
+        # Loans go in borrowed order, as they would have been recorded.
+        loans = heapq.merge(returned_loans(), open_loans, key=itemgetter(0))
+        borrow_rows = (dict(zip(LOAN_FIELDS, row)) for row in loans)
+        for model, rows in ((Book, book_rows), (Student, student_rows), (BorrowRecord, borrow_rows)):
+            for chunk in _chunks(rows):
+                db.execute(insert(model), chunk)
+            db.commit()
+
+        sweep_overdue(db, full=True)
+        reconcile_stats(db)
+        bump_versions(db, *ALL_FAMILIES)
+        db.commit()
+    finally:
+        db.close()
+
+    if engine.dialect.name == "sqlite":
+        with engine.connect() as connection:
+            connection.exec_driver_sql("ANALYZE")
+    return {
+        "sections": len(section_ids),
+        "books": books,
+        "students": students,
+        "borrows": returned + len(open_loans),
+        "open": len(open_pairs),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database", help="SQLite file or database URL (default: DATABASE_URL)")
+    parser.add_argument("--sections", type=int, default=6)
+    parser.add_argument("--books", type=int, default=100_000)
+    parser.add_argument("--students", type=int, default=50_000)
+    parser.add_argument("--borrows", type=int, default=1_000_000)
+    parser.add_argument("--returned-ratio", type=float, default=0.85, help="Share of loans already returned")
+    parser.add_argument("--overdue-ratio", type=float, default=0.3, help="Share of open loans past due")
+    parser.add_argument("--late-ratio", type=float, default=0.15, help="Share of returns made late")
+    parser.add_argument("--history-days", type=int, default=730, help="How far back returned loans go")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--as-of", type=date.fromisoformat, help="Date loans are laid out against (YYYY-MM-DD)")
+    args = parser.parse_args()
+    if min(args.books, args.students) < 1:
+        parser.error("--books and --students must be at least 1")
+
+    if args.database:
+        url = args.database if "://" in args.database else f"sqlite:///{Path(args.database).resolve().as_posix()}"
+        os.environ["DATABASE_URL"] = url
+
+    started = time.perf_counter()
+    try:
+        counts = generate(
+            sections=args.sections,
+            books=args.books,
+            students=args.students,
+            borrows=args.borrows,
+            returned_ratio=args.returned_ratio,
+            overdue_ratio=args.overdue_ratio,
+            late_ratio=args.late_ratio,
+            history_days=args.history_days,
+            seed=args.seed,
+            as_of=args.as_of,
+        )
+    except ValueError as exc:
+        parser.error(str(exc))
+    summary = "  ".join(f"{name}: {count}" for name, count in counts.items())
+    print(f"{summary}  ({time.perf_counter() - started:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
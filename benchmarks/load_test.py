@@ -0,0 +1,279 @@
+"""Load-test a running API over HTTP and check the inventory afterwards.
+
+By default a scratch database is generated and a local uvicorn server is
+started on it. Many concurrent clients then replay a weighted mix of
+borrows, returns and reads. The report gives throughput and p50/p95/p99
+latency per route. Afterwards every book is checked for
+available_copies + active borrows == total_copies. The exit status is 1
+if the invariant breaks or any request failed with a 5xx or a transport
+error. Requires httpx and uvicorn.
+
+    python -m benchmarks.load_test --requests 20000 --concurrency 64 \\
+        --mix borrow=30,return=25,books=20,students=15,dashboard=10
+
+Use --database to run against an existing (e.g. generated) database, and
+--url to target a server you started yourself; the invariant check then
+needs --database pointing at the same data.
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+ROUTES = ("borrow", "return", "books", "students", "dashboard")
+DEFAULT_MIX = "borrow=30,return=25,books=20,students=15,dashboard=10"
+SAMPLE_SIZE = 500
+
+
+def parse_mix(value: str) -> Dict[str, int]:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ROUTES or not weight.strip().isdigit():
+            raise argparse.ArgumentTypeError(f"expected route=weight with route in {', '.join(ROUTES)}: {part!r}")
+        mix[name] = int(weight)
+    if not any(mix.values()):
+        raise argparse.ArgumentTypeError("at least one route needs a positive weight")
+    return mix
+
+
+def _percentile(ordered: List[float], fraction: float) -> float:
+    # Nearest-rank percentile over an already sorted sample.
+    return ordered[max(0, min(len(ordered) - 1, round(fraction * len(ordered)) - 1))]
+
+
+class LoadRun:
+    """Shared state for one run: request pools, loans opened here, and per-route samples."""
+
+    def __init__(self, matrics: List[str], book_ids: List[int], seed: int) -> None:
+        self.matrics = matrics
+        self.book_ids = book_ids
+        self.seed = seed
+        self.open_loans: List[int] = []
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+        self.failures: Dict[str, int] = defaultdict(int)
+
+    async def _send(self, client, route: str, method: str, path: str, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, path, **kwargs)
+        except Exception:
+            self.failures[route] += 1
+            return None
+        self.latencies[route].append(time.perf_counter() - started)
+        self.statuses[route][response.status_code] += 1
+        if response.status_code >= 500:
+            self.failures[route] += 1
+        return response
+
+    async def _call(self, client, route: str, rnd: random.Random) -> None:
+        if route == "return" and not self.open_loans:
+            # Nothing to return yet, so open a loan instead.
+            route = "borrow"
+        if route == "borrow":
+            payload = {"student_id": rnd.choice(self.matrics), "book_id": rnd.choice(self.book_ids)}
+            response = await self._send(client, route, "POST", "/borrow", json=payload)
+            if response is not None and response.status_code == 200:
+                self.open_loans.append(response.json()["id"])
+        elif route == "return":
+            borrow_id = self.open_loans.pop(rnd.randrange(len(self.open_loans)))
+            await self._send(client, route, "POST", f"/return/{borrow_id}")
+        elif route == "books":
+            await self._send(client, route, "GET", "/books", params={"limit": 50})
+        elif route == "students":
+            await self._send(client, route, "GET", "/students", params={"limit": 50})
+        else:
+            await self._send(client, route, "GET", "/dashboard")
+
+    async def drive(self, client, mix: Dict[str, int], total: int, concurrency: int) -> float:
+        """Issue `total` requests from `concurrency` clients; returns the elapsed seconds."""
+        routes = list(mix)
+        weights = [mix[name] for name in routes]
+        remaining = [total]
+
+        async def worker(index: int) -> None:
+            rnd = random.Random(self.seed * 1_000 + index)
+            while remaining[0] > 0:
+                remaining[0] -= 1
+                await self._call(client, rnd.choices(routes, weights)[0], rnd)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(index) for index in range(concurrency)))
+        return time.perf_counter() - started
+
+    def report(self, elapsed: float) -> List[str]:
+        lines = [
+            f"{'route':<11}{'requests':>9}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'failed':>8}  statuses"
+        ]
+        for route in ROUTES:
+            samples = sorted(self.latencies.get(route, []))
+            if not samples and not self.failures.get(route):
+                continue
+            statuses = " ".join(f"{code}:{count}" for code, count in sorted(self.statuses[route].items()))
+            p50, p95, p99 = (
+                (_percentile(samples, fraction) * 1000 for fraction in (0.5, 0.95, 0.99))
+                if samples
+                else (0.0, 0.0, 0.0)
+            )
+            lines.append(
+                f"{route:<11}{len(samples):>9}{len(samples) / elapsed:>9.1f}{p50:>9.2f}{p95:>9.2f}{p99:>9.2f}"
+                f"{self.failures[route]:>8}  {statuses}"
+            )
+        completed = sum(len(samples) for samples in self.latencies.values())
+        writes = self.statuses["borrow"][200] + self.statuses["return"][200]
+        every = sorted(sample for samples in self.latencies.values() for sample in samples)
+        lines.append(
+            f"total: {completed} requests in {elapsed:.2f} s = {completed / elapsed:.1f} req/s, "
+            f"{writes / elapsed:.1f} successful borrows+returns/s"
+            + (f", overall p50 {statistics.median(every) * 1000:.2f} ms" if every else "")
+        )
+        return lines
+
+
+def check_inventory(database_url: str) -> List[Tuple[int, int, int, int]]:
+    """Return (book_id, total, available, active) for every book where the counts disagree."""
+    from sqlalchemy import create_engine, func
+    from sqlalchemy.orm import Session
+
+    from backend.models import Book, BorrowRecord
+
+    engine = create_engine(database_url)
+    try:
+        with Session(engine) as db:
+            active = (
+                db.query(BorrowRecord.book_id, func.count(BorrowRecord.id).label("active"))
+                .filter(BorrowRecord.returned_at.is_(None))
+                .group_by(BorrowRecord.book_id)
+                .subquery()
+            )
+            open_count = func.coalesce(active.c.active, 0)
+            return [
+                tuple(row)
+                for row in db.query(Book.id, Book.total_copies, Book.available_copies, open_count)
+                .outerjoin(active, active.c.book_id == Book.id)
+                .filter(Book.available_copies + open_count != Book.total_copies)
+                .order_by(Book.id)
+            ]
+    finally:
+        engine.dispose()
+
+
+async def _sample(client) -> Tuple[List[str], List[int]]:
+    students = (await client.get("/students", params={"limit": SAMPLE_SIZE})).json()["items"]
+    books = (await client.get("/books", params={"limit": SAMPLE_SIZE})).json()["items"]
+    return [student["matric_number"] for student in students], [book["id"] for book in books]
+
+
+async def _run(base_url: str, mix: Dict[str, int], total: int, concurrency: int, seed: int) -> Tuple[LoadRun, float]:
+    import httpx
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        matrics, book_ids = await _sample(client)
+        if not matrics or not book_ids:
+            raise SystemExit("The database needs students and books; generate some with benchmarks.generate_data")
+        run = LoadRun(matrics, book_ids, seed)
+        elapsed = await run.drive(client, mix, total, concurrency)
+    return run, elapsed
+
+
+def _start_server(database_url: str, port: int, workers: int) -> subprocess.Popen:
+    import httpx
+
+    env = dict(os.environ, DATABASE_URL=database_url)
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "backend.main:app",
+            "--port", str(port), "--workers", str(workers), "--log-level", "warning",
+        ],
+        cwd=Path(__file__).resolve().parents[1],
+        env=env,
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise SystemExit(f"uvicorn exited with status {server.returncode}")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                return server
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    server.terminate()
+    raise SystemExit("uvicorn did not become healthy within 60 s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX), help=f"default {DEFAULT_MIX}")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--database", help="SQLite file or database URL (default: a generated scratch database)")
+    parser.add_argument("--url", help="Target an already running server instead of starting uvicorn")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--books", type=int, default=2000, help="Scratch database size without --database")
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--borrows", type=int, default=20000)
+    args = parser.parse_args()
+    if args.requests < 1 or args.concurrency < 1:
+        parser.error("--requests and --concurrency must be at least 1")
+
+    database_url: Optional[str] = None
+    if args.database:
+        database_url = args.database if "://" in args.database else f"sqlite:///{Path(args.database).resolve().as_posix()}"
+    elif not args.url:
+        scratch = Path(tempfile.mkdtemp()) / "load.db"
+        database_url = f"sqlite:///{scratch.as_posix()}"
+        os.environ["DATABASE_URL"] = database_url
+        from benchmarks.generate_data import generate
+
+        print(f"Generating {args.borrows} loans into {scratch} ...")
+        generate(books=args.books, students=args.students, borrows=args.borrows, seed=args.seed)
+
+    server = None
+    base_url = args.url
+    if not base_url:
+        server = _start_server(database_url, args.port, args.workers)
+        base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        run, elapsed = asyncio.run(_run(base_url, args.mix, args.requests, args.concurrency, args.seed))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    print("\n".join(run.report(elapsed)))
+    failed = sum(run.failures.values())
+
+    if database_url is None:
+        print("Inventory check skipped: pass --database for the server's data.")
+        mismatches = []
+    else:
+        mismatches = check_inventory(database_url)
+        if mismatches:
+            print(f"Inventory drift on {len(mismatches)} book(s) (id, total, available, active):")
+            for row in mismatches[:20]:
+                print(f"  {row}")
+        else:
+            print("Inventory OK: available_copies + active borrows == total_copies for every book.")
+
+    if failed or mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
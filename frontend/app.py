@@ -1,3 +1,4 @@
+from collections import OrderedDict
 from pathlib import Path
 
 import requests
@@ -16,6 +17,11 @@ DEFAULT_SECTIONS = [
     "RELIGION",
     "GENERAL STUDIES",
 ]
+PAGE_SIZE = 50
+SEARCH_LIMIT = 20
+LOOKUP_LIMIT = 20
+# Most recently used GET responses each visitor keeps for ETag revalidation.
+ETAG_CACHE_SIZE = 64
 
 
 st.set_page_config(page_title="Library Management System", layout="wide")
@@ -25,12 +31,27 @@ st.caption("Empowering minds, enriching lives.")
 
 def api_request(method: str, base_url: str, path: str, **kwargs):
     url = f"{base_url}{path}"
+    # Revalidate GETs with the last ETag so unchanged reads come back as an empty 304.
+    cache_key = None
+    cached = None
+    if method == "GET":
+        cache_key = (url, tuple(sorted((kwargs.get("params") or {}).items())))
+        etag_cache = st.session_state.setdefault("etag_cache", OrderedDict())
+        cached = etag_cache.get(cache_key)
+        if cached:
+            etag_cache.move_to_end(cache_key)
+            kwargs["headers"] = {**kwargs.get("headers", {}), "If-None-Match": cached[0]}
+    # A per-visitor session keeps the API's read-your-writes cookie between calls.
+    http = st.session_state.setdefault("http", requests.Session())
     try:
-        response = requests.request(method, url, timeout=15, **kwargs)
+        response = http.request(method, url, timeout=15, **kwargs)
     except requests.RequestException as exc:
         st.error(f"API request failed: {exc}")
         return None
 
+    if response.status_code == 304 and cached:
+        return cached[1]
+
     try:
         payload = response.json() if response.text else {}
     except ValueError:
@@ -40,9 +61,56 @@ def api_request(method: str, base_url: str, path: str, **kwargs):
         message = payload.get("detail", "Request failed")
         st.error(f"{response.status_code}: {message}")
         return None
+    if cache_key and response.headers.get("ETag"):
+        etag_cache = st.session_state["etag_cache"]
+        etag_cache[cache_key] = (response.headers["ETag"], payload)
+        etag_cache.move_to_end(cache_key)
+        # Every search term and page cursor is its own key; drop the least recently used.
+        while len(etag_cache) > ETAG_CACHE_SIZE:
+            etag_cache.popitem(last=False)
     return payload
 
 
+def fetch_page(base_url: str, path: str, key: str, params=None):
+    # One keyset page per render. The cursors of the pages walked so far live in
+    # session state, so Previous needs no offset; new filters start from page 1.
+    params = dict(params or {}, limit=PAGE_SIZE)
+    signature = (path, tuple(sorted(params.items())))
+    pagers = st.session_state.setdefault("pagers", {})
+    pager = pagers.get(key)
+    if not pager or pager["signature"] != signature:
+        pager = pagers[key] = {"signature": signature, "cursors": [None]}
+
+    cursor = pager["cursors"][-1]
+    page = api_request("GET", base_url, path, params={**params, "after": cursor} if cursor else params) or {}
+    next_cursor = page.get("next_cursor")
+
+    col_prev, col_page, col_next = st.columns([1, 2, 1])
+    if col_prev.button("Previous", key=f"{key}_previous", disabled=len(pager["cursors"]) == 1):
+        pager["cursors"].pop()
+        st.rerun()
+    col_page.caption(f"Page {len(pager['cursors'])}")
+    if col_next.button("Next", key=f"{key}_next", disabled=not next_cursor):
+        pager["cursors"].append(next_cursor)
+        st.rerun()
+    return page.get("items", [])
+
+
+def search_books(base_url: str, query: str, **params):
+    query = query.strip()
+    if not query:
+        return []
+    page = api_request("GET", base_url, "/books/search", params={"q": query, "limit": SEARCH_LIMIT, **params})
+    return (page or {}).get("items", [])
+
+
+def lookup_students(base_url: str, prefix: str):
+    prefix = prefix.strip()
+    if not prefix:
+        return []
+    return api_request("GET", base_url, "/students/lookup", params={"prefix": prefix, "limit": LOOKUP_LIMIT}) or []
+
+
 def render_table(rows, empty_message: str = "No records found.") -> None:
     if rows:
         st.dataframe(rows, use_container_width=True, hide_index=True)
@@ -65,7 +133,7 @@ if not health:
 sections = api_request("GET", api_base, "/sections") or []
 if not sections:
     # Fall back to required section names so UI remains usable.
-    sections = [{"id": 0, "name": name, "book_count": 0} for name in DEFAULT_SECTIONS]
+    sections = [{"id": 0, "name": name, "book_count": 0, "available_count": 0} for name in DEFAULT_SECTIONS]
 
 section_names = [section["name"] for section in sections]
 section_map = {section["name"]: section["id"] for section in sections}
@@ -92,7 +160,7 @@ if menu == "Dashboard":
         col8.metric("Outstanding Fines", f"#{dashboard['outstanding_fines']:.2f}")
 
         st.subheader("Current Borrowed Books")
-        active_borrows = api_request("GET", api_base, "/borrows", params={"only_active": True}) or []
+        active_borrows = fetch_page(api_base, "/borrows", "dashboard_borrows", params={"only_active": True})
         render_table(active_borrows, "No active borrows yet.")
 
 
@@ -133,13 +201,17 @@ elif menu == "Books":
         params = {"include_out_of_stock": include_out_of_stock}
         if section_filter != "ALL" and section_map[section_filter] > 0:
             params["section_id"] = section_map[section_filter]
-        books = api_request("GET", api_base, "/books", params=params) or []
+        books = fetch_page(api_base, "/books", "inventory", params=params)
 
         render_table(books, "No books found for selected filter.")
 
-        if books:
-            with st.expander("Restock Book"):
-                options = {f"#{book['id']} - {book['title']} ({book['version']})": book["id"] for book in books}
+        with st.expander("Restock Book"):
+            restock_query = st.text_input("Find Book", placeholder="Title, author or version", key="restock_search")
+            matches = search_books(api_base, restock_query)
+            if restock_query and not matches:
+                st.info("No books match your search.")
+            if matches:
+                options = {f"#{book['id']} - {book['title']} ({book['version']})": book["id"] for book in matches}
                 selected = st.selectbox("Book", options=list(options.keys()))
                 add_copies = st.number_input("Copies to Add", min_value=1, step=1)
 
@@ -180,19 +252,25 @@ elif menu == "Students":
                     st.rerun()
 
     with col_list:
-        students = api_request("GET", api_base, "/students") or []
+        students = fetch_page(api_base, "/students", "students")
         render_table(students, "No students registered yet.")
 
 
 elif menu == "Borrow Book":
     st.subheader("Borrow a Book")
-    students = api_request("GET", api_base, "/students") or []
-    books = api_request("GET", api_base, "/books", params={"include_out_of_stock": False}) or []
-
-    if not students:
-        st.warning("No Student in Databse.")
+    student_query = st.text_input("Find Student", placeholder="Name, matric number or email", key="borrow_student_search")
+    students = lookup_students(api_base, student_query)
+    book_query = st.text_input("Find Book", placeholder="Title, author or version", key="borrow_book_search")
+    books = search_books(api_base, book_query, include_out_of_stock=False)
+
+    if not student_query.strip():
+        st.info("Search for the student who is borrowing.")
+    elif not students:
+        st.warning("No students match your search.")
+    elif not book_query.strip():
+        st.info("Search the catalogue to pick a book.")
     elif not books:
-        st.warning("Books Unavailable.")
+        st.warning("No available books match your search.")
     else:
         student_options = {
             f"#{student['id']} - {student['full_name']} ({student['matric_number']})": student["id"]
@@ -224,13 +302,14 @@ elif menu == "Borrow Book":
                     st.rerun()
 
     st.markdown("### Active Borrows")
-    active = api_request("GET", api_base, "/borrows", params={"only_active": True}) or []
+    active = fetch_page(api_base, "/borrows", "borrow_active", params={"only_active": True})
     render_table(active, "No active borrow records.")
 
 
 elif menu == "Return Book":
     st.subheader("Return Borrowed Book")
-    active_borrows = api_request("GET", api_base, "/borrows", params={"only_active": True}) or []
+    # The picker offers one page of open loans at a time, newest first.
+    active_borrows = fetch_page(api_base, "/borrows", "return_active", params={"only_active": True})
     if not active_borrows:
         st.info("There are no active borrows to return.")
     else:
@@ -255,35 +334,32 @@ elif menu == "Return Book":
 
 elif menu == "Defaulters":
     st.subheader("Defaulters and Outstanding Fines")
-    defaulters = api_request("GET", api_base, "/defaulters") or []
-    total_outstanding = sum(item.get("outstanding_fine", 0.0) for item in defaulters)
-    st.metric("Total Outstanding Fine", f"#{total_outstanding:.2f}")
+    # The dashboard already totals every defaulter's fine; the table shows one page.
+    dashboard = api_request("GET", api_base, "/dashboard") or {}
+    st.metric("Total Outstanding Fine", f"#{dashboard.get('outstanding_fines', 0.0):.2f}")
+    defaulters = fetch_page(api_base, "/defaulters", "defaulters")
     render_table(defaulters, "No defaulters currently.")
 
 
 else:
     section_name = menu.split("Section: ", 1)[1]
     section_id = section_map.get(section_name, 0)
+    section = next(item for item in sections if item["name"] == section_name)
     st.subheader(f"{section_name} Section")
 
     params = {"include_out_of_stock": True}
     if section_id > 0:
         params["section_id"] = section_id
 
-    books = api_request(
-        "GET",
-        api_base,
-        "/books",
-        params=params,
-    ) or []
-
     col_a, col_b, col_c = st.columns(3)
-    total_titles = len(books)
-    available_titles = sum(1 for book in books if book["available_copies"] > 0)
+    # Counted by the API, so the metrics do not need every book in the section.
+    total_titles = section["book_count"]
+    available_titles = section.get("available_count", 0)
     out_of_stock_titles = total_titles - available_titles
 
     col_a.metric("Titles in Section", total_titles)
     col_b.metric("Available Titles", available_titles)
     col_c.metric("Out of Stock Titles", out_of_stock_titles)
 
+    books = fetch_page(api_base, "/books", f"section_{section_name}", params=params)
     render_table(books, f"No books in {section_name} yet.")
@@ -0,0 +1,53 @@
+import os
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+# Keep module-level engines off the real database file.
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, sessionmaker
+
+from backend.migrations import upgrade
+
+
+@pytest.fixture
+def engine(tmp_path):
+    bind = create_engine(f"sqlite:///{(tmp_path / 'test.db').as_posix()}")
+    upgrade(bind)
+    yield bind
+    bind.dispose()
+
+
+@pytest.fixture
+def db(engine) -> Iterator[Session]:
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def statements(engine):
+    """`with statements() as issued:` collects the SQL run on the test engine."""
+
+    @contextmanager
+    def record() -> Iterator[List[str]]:
+        issued: List[str] = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            issued.append(" ".join(statement.split()))
+
+        event.listen(engine, "before_cursor_execute", capture)
+        try:
+            yield issued
+        finally:
+            event.remove(engine, "before_cursor_execute", capture)
+
+    return record
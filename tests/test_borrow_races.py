@@ -0,0 +1,75 @@
+import threading
+
+from fastapi import HTTPException
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import sessionmaker
+
+from backend import crud
+from backend.models import BorrowRecord
+from backend.schemas import BookCreate, BorrowCreate, StudentCreate
+
+
+def _seed(db, copies=30):
+    section_id = crud.list_sections(db)[0]["id"]
+    crud.create_student(db, StudentCreate(full_name="Race Student", matric_number="RACE/001", email="race@example.com"))
+    return crud.create_book(
+        db, BookCreate(title="Race", author="A", version="1", cost=1, section_id=section_id, total_copies=copies)
+    )["id"]
+
+
+def _open_loans(engine):
+    with engine.connect() as connection:
+        return connection.execute(select(func.count()).where(BorrowRecord.returned_at.is_(None))).scalar()
+
+
+def test_concurrent_borrows_open_one_loan(engine, db):
+    book_id = _seed(db)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    start = threading.Barrier(20)
+    outcomes = []
+
+    def borrow():
+        session = Session()
+        try:
+            start.wait()
+            crud.borrow_book(session, BorrowCreate(student_id="RACE/001", book_id=book_id))
+            outcomes.append(200)
+        except HTTPException as exc:
+            outcomes.append(exc.status_code)
+        finally:
+            session.close()
+
+    threads = [threading.Thread(target=borrow) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(outcomes) == [200] + [409] * 19
+    assert _open_loans(engine) == 1
+    assert crud.list_books(db)["items"][0]["available_copies"] == 29
+
+
+def test_batch_reports_a_loan_opened_after_its_read_as_409(engine, db):
+    book_id = _seed(db)
+    racing = []
+
+    def borrow_elsewhere(conn, cursor, statement, parameters, context, executemany):
+        # Open the same loan from another session between the batch's read and its insert.
+        if statement.startswith("UPDATE books") and not racing:
+            racing.append(True)
+            other = sessionmaker(bind=engine)()
+            try:
+                crud.borrow_book(other, BorrowCreate(student_id="RACE/001", book_id=book_id))
+            finally:
+                other.close()
+
+    event.listen(engine, "before_cursor_execute", borrow_elsewhere)
+    try:
+        batch = crud.borrow_books_batch(db, [BorrowCreate(student_id="RACE/001", book_id=book_id)])
+    finally:
+        event.remove(engine, "before_cursor_execute", borrow_elsewhere)
+
+    assert [(result["ok"], result["status_code"]) for result in batch["results"]] == [(False, 409)]
+    assert _open_loans(engine) == 1
+    assert crud.list_books(db)["items"][0]["available_copies"] == 29
@@ -0,0 +1,41 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+from backend import crud
+from backend.config import FINE_PER_DAY
+from backend.models import BorrowRecord
+from backend.overdue import sweep_overdue
+from backend.schemas import BookCreate, BorrowCreate, StudentCreate
+
+
+def _loan(db):
+    section_id = crud.list_sections(db)[0]["id"]
+    crud.create_student(db, StudentCreate(full_name="Late Student", matric_number="LATE/001", email="late@example.com"))
+    book_id = crud.create_book(
+        db, BookCreate(title="Late", author="A", version="1", cost=1, section_id=section_id, total_copies=1)
+    )["id"]
+    return crud.borrow_book(db, BorrowCreate(student_id="LATE/001", book_id=book_id))["id"]
+
+
+def _views(db):
+    return (
+        [item["status"] for item in crud.list_borrows(db)["items"]],
+        len(crud.list_borrows(db, only_overdue=True)["items"]),
+        len(crud.list_defaulters(db)["items"]),
+        crud.dashboard_summary(db)["overdue_borrows"],
+    )
+
+
+def test_listings_agree_with_the_swept_status(db):
+    borrow_id = _loan(db)
+    sweep_overdue(db)
+    # Edited outside the API to a due date before the last sweep.
+    db.execute(update(BorrowRecord).where(BorrowRecord.id == borrow_id).values(due_at=datetime.now() - timedelta(days=3)))
+    db.commit()
+    assert _views(db) == (["BORROWED"], 0, 0, 0)
+
+    result = sweep_overdue(db)
+    assert (result["flipped"], result["assessed"]) == (1, 1)
+    assert _views(db) == (["OVERDUE"], 1, 1, 1)
+    assert crud.list_defaulters(db)["items"][0]["outstanding_fine"] == 3 * FINE_PER_DAY
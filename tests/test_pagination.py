@@ -0,0 +1,46 @@
+import base64
+import json
+
+import pytest
+from fastapi import HTTPException
+
+from backend import crud
+from backend.pagination import decode_cursor, encode_cursor
+
+
+def _cursor(payload) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [[["a"], 1], [{"x": 1}, 1], [{"dt": 5}, 1], ["a", "1"], ["a", 1.5], [True, 1], ["a", None], {"a": 1, "b": 2}, ["a"]],
+)
+def test_malformed_cursors_are_rejected(payload):
+    with pytest.raises(HTTPException) as raised:
+        decode_cursor(_cursor(payload))
+    assert raised.value.status_code == 400
+
+
+def test_cursor_round_trip_checks_the_sort_type():
+    assert decode_cursor(encode_cursor("Title", 3), str) == ("Title", 3)
+    with pytest.raises(HTTPException):
+        decode_cursor(encode_cursor(7, 3), str)
+
+
+@pytest.mark.parametrize("listing", [crud.list_books, crud.list_students, crud.list_borrows])
+def test_listings_answer_400_for_a_non_scalar_sort_value(db, listing):
+    with pytest.raises(HTTPException) as raised:
+        listing(db, after=_cursor([["x"], 1]))
+    assert raised.value.status_code == 400
+
+
+@pytest.mark.parametrize("offset", ["10", {"dt": "2024-01-01T00:00:00"}, {"x": 1}, -1, 2.5, True])
+def test_search_rejects_offsets_that_are_not_non_negative_ints(db, offset):
+    with pytest.raises(HTTPException) as raised:
+        crud.search_books(db, "budget", after=_cursor([offset, 1]))
+    assert raised.value.status_code == 400
+
+
+def test_search_follows_its_own_cursor(db):
+    assert crud.search_books(db, "budget", after=encode_cursor(50, 1))["items"] == []
@@ -0,0 +1,8 @@
+from backend.query_budget import check_query_budgets
+
+
+def test_routes_stay_within_their_query_budgets():
+    results = check_query_budgets()
+    assert {result["route"] for result in results} >= {"POST /borrow/batch", "POST /return/batch"}
+    problems = [result for result in results if result["violations"] or result["status"] >= 400]
+    assert problems == []
@@ -0,0 +1,11 @@
+from backend.query_plans import _is_full_scan, check_query_plans
+
+
+def test_hot_paths_use_indexes():
+    offenders = [" ".join(result["statement"].split())[:200] for result in check_query_plans() if result["full_scan"]]
+    assert offenders == []
+
+
+def test_sort_inside_a_subquery_is_flagged():
+    plan = ["CO-ROUTINE page", "SCAN borrow_records USING INDEX ix_borrow_records_borrowed_at_id", "USE TEMP B-TREE FOR ORDER BY"]
+    assert _is_full_scan(plan)
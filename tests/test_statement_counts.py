@@ -0,0 +1,72 @@
+from backend import crud
+from backend.schemas import BookCreate, BorrowCreate, StudentCreate
+
+
+def _seed(db, books=1, copies=2):
+    section_id = crud.list_sections(db)[0]["id"]
+    crud.create_student(db, StudentCreate(full_name="Count Student", matric_number="CNT/001", email="count@example.com"))
+    return [
+        crud.create_book(
+            db,
+            BookCreate(title=f"Count {index}", author="A", version="1", cost=1, section_id=section_id, total_copies=copies),
+        )["id"]
+        for index in range(books)
+    ]
+
+
+def _reads_loans_after_insert(issued):
+    inserted = next(index for index, statement in enumerate(issued) if statement.startswith("INSERT INTO borrow_records"))
+    return [
+        statement
+        for statement in issued[inserted + 1 :]
+        if statement.startswith("SELECT") and "FROM borrow_records" in statement
+    ]
+
+
+def test_borrow_book_does_not_reload_the_new_loan(db, statements):
+    (book_id,) = _seed(db)
+    with statements() as issued:
+        borrow = crud.borrow_book(db, BorrowCreate(student_id="CNT/001", book_id=book_id))
+    assert borrow["due_at"] is not None
+    assert _reads_loans_after_insert(issued) == []
+    assert len(issued) == 9, issued
+
+
+def test_borrow_batch_does_not_reload_each_loan(db, statements):
+    book_ids = _seed(db, books=4)
+    with statements() as issued:
+        batch = crud.borrow_books_batch(db, [BorrowCreate(student_id="CNT/001", book_id=book_id) for book_id in book_ids])
+    assert batch["succeeded"] == 4
+    assert _reads_loans_after_insert(issued) == []
+    # Three IN lookups; a guarded stock decrement and an INSERT per item; stats and three version bumps.
+    assert len(issued) == 3 + 4 * 2 + 1 + 3, issued
+
+
+def test_return_batch_does_not_reload_each_loan(db, statements):
+    book_ids = _seed(db, books=4)
+    borrowed = crud.borrow_books_batch(db, [BorrowCreate(student_id="CNT/001", book_id=book_id) for book_id in book_ids])
+    borrow_ids = [result["borrow"]["id"] for result in borrowed["results"]]
+    with statements() as issued:
+        batch = crud.return_books_batch(db, borrow_ids)
+    assert batch["succeeded"] == 4
+    closes = [index for index, statement in enumerate(issued) if statement.startswith("UPDATE borrow_records")]
+    assert [statement for statement in issued[closes[0] :] if "FROM borrow_records" in statement and statement.startswith("SELECT")] == []
+
+
+def test_create_student_skips_the_open_loan_aggregate(db, statements):
+    with statements() as issued:
+        student = crud.create_student(
+            db, StudentCreate(full_name="New Student", matric_number="CNT/002", email="new@example.com")
+        )
+    assert (student["active_borrows"], student["outstanding_fine"]) == (0, 0.0)
+    assert student["created_at"] is not None
+    assert [statement for statement in issued if "borrow_records" in statement] == []
+
+
+def test_list_students_counts_loans_for_the_page_only(db, statements):
+    (book_id,) = _seed(db)
+    crud.borrow_book(db, BorrowCreate(student_id="CNT/001", book_id=book_id))
+    with statements() as issued:
+        page = crud.list_students(db)
+    assert [(item["matric_number"], item["active_borrows"]) for item in page["items"]] == [("CNT/001", 1)]
+    assert len(issued) == 1 and "GROUP BY" not in issued[0], issued